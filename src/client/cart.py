@@ -7,42 +7,121 @@ store the items caracteristics bought by a member.
 
 #-------------------------------------------------------------------#
 
+from src.utils.money import Money
+
+#-------------------------------------------------------------------#
+
+class CartLine:
+    """
+    Line of the cart: a product, its quantity and its unit price.
+    """
+    __slots__ = ("product_id", "quantity", "unit_price", "subtotal")
+
+    def __init__(self, product_id:int, unit_price:Money) -> None:
+        self.product_id = product_id
+        self.quantity = 0
+        self.unit_price = unit_price
+        self.subtotal = Money()
+
+    def __repr__(self) -> str:
+        return f"CartLine({self.product_id}, {self.quantity} x {self.unit_price})"
+
+#-------------------------------------------------------------------#
 
 class Cart:
     """
     Cart of the member logged on the current session.
+
+    Lines are indexed by product id and the total is updated on every
+    change, so a tap never scans the cart. Refills have no product id:
+    they are indexed by their unit price.
     """
-    def __init__(self, loggers, member=None) -> None:
+    def __init__(self, loggers, member=None, on_change:callable=None) -> None:
         self.loggers = loggers
         self.member = member
-        self.items = []
-        self.total = 0
+        self.on_change = on_change # Called after every change of the cart
+        self.items = {} # line key -> CartLine
+        self.total = Money()
+
+    def _changed(self) -> None:
+        """
+        Notifies the listener of a change of the cart.
+        """
+        if self.on_change is not None:
+            self.on_change()
 
-    def add_to_cart(self, item) -> None:
+    @staticmethod
+    def line_key(product_id:int, unit_price:Money):
         """
-        Adds an item to the cart.
+        Returns the key of the line of the product.
         """
-        item_name = list(item.keys())[0]
-        item_amount = item[item_name][0]
-        item_price = item[item_name][1]
-        for existing_item in self.items:
-            if item_name in existing_item:
-                existing_item[item_name] = (item_amount, item_price)
-                return
+        return product_id if product_id is not None else (None, unit_price)
 
-        self.items.append({item_name: (item_amount, item_price)})
+    def add(self, product_id:int, unit_price:Money, quantity:int=1) -> CartLine:
+        """
+        Adds a quantity of a product to the cart.
+        Returns the line of the product.
+        """
+        key = self.line_key(product_id, unit_price)
+        line = self.items.get(key)
+        if line is None:
+            line = self.items[key] = CartLine(product_id, unit_price)
+        added = unit_price*quantity
+        line.quantity += quantity
+        line.subtotal += added
+        self.total += added
+        self._changed()
+        return line
+
+    def decrement(self, product_id:int, unit_price:Money, quantity:int=1) -> CartLine:
+        """
+        Removes a quantity of a product from the cart.
+        The line is removed once its quantity reaches zero.
+        Returns the line of the product, or None if it has been removed.
+        """
+        key = self.line_key(product_id, unit_price)
+        line = self.items.get(key)
+        if line is None:
+            return None
+        if quantity >= line.quantity:
+            return self.remove(product_id, unit_price)
+        removed = unit_price*quantity
+        line.quantity -= quantity
+        line.subtotal -= removed
+        self.total -= removed
+        self._changed()
+        return line
+
+    def remove(self, product_id:int, unit_price:Money) -> None:
+        """
+        Removes the line of a product from the cart.
+        """
+        line = self.items.pop(self.line_key(product_id, unit_price), None)
+        if line is not None:
+            self.total -= line.subtotal
+            self._changed()
+
+    def lines(self) -> list:
+        """
+        Returns the lines of the cart, in the order they were added.
+        """
+        return list(self.items.values())
 
     def reset(self) -> None:
         """
         Resets the cart.
         """
-        self.items = []
-        self.total = 0
+        self.items = {}
+        self.total = Money()
+        self._changed()
+
+    def __len__(self) -> int:
+        return len(self.items)
 
     def __str__(self) -> str:
         if self.member is None:
             return "No user is logged in."
-        return f"Cart of {self.member.nickname}: {self.items.__str__()}"
+        return f"Cart of {self.member.nickname}: {self.lines()}"
 
     def __repr__(self) -> str:
         return self.__str__()
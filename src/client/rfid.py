@@ -3,48 +3,91 @@ rfid.py
 
 This file is responsible for the RFID reader.
 MarcoNeo app uses the binding tkinter method
-to listen to the RFID reader.
+to listen to the RFID reader, unless its device
+is read directly (see rfid_reader.py).
 """
 
 #------------------------------------------------------------#
-from src.utils.hardware import key_to_number
+from src.utils.hardware import LayoutDetector
+from src.client.rfid_reader import RFIDReader
+from src.client.scan_framer import ScanFramer
 
 class RFID:
     """
     Defines the RFID reader.
     """
-    def __init__(self, app) -> None:
+    # Device of the reader, e.g. "/dev/input/by-id/...-event-kbd".
+    # If None, the scans are read from the keyboard events of the window.
+    DEVICE = None
+    # Base of the card numbers typed by the reader: 16 if it types the UID
+    # of the cards in hexadecimal. Never guessed from the scans.
+    CARD_BASE = 10
+
+    def __init__(self, app, device:str=DEVICE) -> None:
         """
         Constructor of the RFID class.
         """
         self.app = app
         self.loggers = self.app.loggers
         self.current_user_id = None
-        self.buffer = ""
+        self.framer = ScanFramer(self.loggers)
+        self.decoder = LayoutDetector(self.loggers, base=self.CARD_BASE)
+        self.reader = RFIDReader(self.loggers, path=device, framer=self.framer,
+                                 decoder=self.decoder) if device else None
+
+    def start(self) -> None:
+        """
+        Starts reading the device of the reader, if there is one.
+        """
+        if self.reader is not None:
+            self.reader.start()
+
+    def stop(self) -> None:
+        """
+        Stops reading the device of the reader, if there is one.
+        """
+        if self.reader is not None:
+            self.reader.stop()
+        self.loggers.log.info("RFID scans: %s", self.framer.stats())
+
+    def poll(self) -> None:
+        """
+        Looks up the members of the scans read from the device.
+        Must be called from the Tk thread.
+        """
+        scanned, card_id = self.reader.get()
+        while scanned:
+            self.scan(card_id)
+            scanned, card_id = self.reader.get()
 
     def rfid_callback(self, event) -> None:
         """
         Callback function for the RFID reader.
         """
-        # If the user presses the enter key (or keypad enter key), the buffer is parsed
+        # Tk gives the time of the event in milliseconds
+        timestamp = event.time / 1000
+
+        # If the user presses the enter key (or keypad enter key), the frame is parsed
         if event.keysym in ('Return', 'KP_Enter'):
-            if self.buffer == "":
-                return  # If the buffer is empty, do nothing
-
-            self.loggers.log.debug(f"Parsing RFID card number {self.buffer}...")
-            try:
-                id_in_buffer = key_to_number(self.buffer)
-            except ValueError:
-                self.loggers.log.error("RFID card corrupted.")
-                self.buffer = ""  # Reset the buffer
-                self.app.update_user(None)
-                return
-            user = self.app.db_cursor.get_member(id_in_buffer)
-            if user is None:
-                self.buffer = ""  # Reset the buffer
-            self.app.update_user(user)
-
-            self.buffer = ""  # Reset the buffer
+            frame = self.framer.enter(timestamp)
+            if frame is None:
+                return  # Not a scan
+
+            self.loggers.log.debug(f"Parsing RFID card number {frame}...")
+            self.scan(self.decoder.decode(frame))
 
         else:
-            self.buffer += event.char
+            self.framer.key(event.char, timestamp)
+
+    def scan(self, id_in_buffer:int=None) -> None:
+        """
+        Logs in the member of the card scanned.
+        """
+        if id_in_buffer is None:
+            self.loggers.log.error("RFID card corrupted.")
+            self.app.update_user(None)
+            return
+
+        # The member is looked up off the Tk thread.
+        self.app.db_worker.submit(self.app.db_cursor.get_member, id_in_buffer,
+                                  callback=self.app.update_user)
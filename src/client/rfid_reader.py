@@ -0,0 +1,233 @@
+"""
+rfid_reader.py
+
+Defines the RFIDReader class, which reads the RFID reader's
+device on its own thread instead of the Tk keyboard events.
+"""
+
+#------------------------------------------------------------#
+
+import os
+import queue
+import select
+import struct
+import time
+
+from src.utils.background_loop import BackgroundLoop
+from src.utils.hardware import LayoutDetector
+from src.client.scan_framer import ScanFramer
+
+#------------------------------------------------------------#
+
+class RFIDReader(BackgroundLoop):
+    """
+    Reads the scans of the RFID reader from a file descriptor
+    in a background thread and queues the card numbers.
+
+    The reader is a keyboard: the descriptor can be its evdev device
+    (/dev/input/event*), its hidraw device (/dev/hidraw*) or any stream
+    of characters (a tty, a pipe...). Each scan is a number followed
+    by Enter, framed by a ScanFramer. The GUI drains the queue (see `get`),
+    so scans are never lost while the main loop is busy or the menus
+    are switched.
+    """
+    EVDEV, HIDRAW, TEXT = "evdev", "hidraw", "text"
+    UNKNOWN_KEY = "?" # Typed for the keys not mapped: no decoder reads it
+    POLL_TIMEOUT = 0.5 # Seconds between two checks of the stop flag
+    RETRY_INTERVAL = 5 # Seconds before reopening a device unplugged
+
+    # evdev: struct input_event, key events and the keycodes of the digits
+    # and of the hex letters (A is typed with the Q key by AZERTY readers)
+    EVENT = struct.Struct("llHHi")
+    EV_KEY = 1
+    EVDEV_KEYS = {2: "1", 3: "2", 4: "3", 5: "4", 6: "5", 7: "6", 8: "7", 9: "8",
+                  10: "9", 11: "0", 71: "7", 72: "8", 73: "9", 75: "4", 76: "5",
+                  77: "6", 79: "1", 80: "2", 81: "3", 82: "0",
+                  30: "A", 16: "A", 48: "B", 46: "C", 32: "D", 18: "E", 33: "F"}
+    EVDEV_ENTER = (28, 96)
+    # Shift, Ctrl, Alt, Meta, Caps Lock and Num Lock: never part of a card number
+    EVDEV_MODIFIERS = (29, 42, 54, 56, 58, 69, 97, 100, 125, 126)
+    EVIOCGRAB = 0x40044590
+
+    # hidraw: 8 bytes boot keyboard reports and the HID usages of the digits
+    # and of the hex letters (modifiers are in the first byte of the report)
+    REPORT_SIZE = 8
+    HID_KEYS = {**{0x1E + index: str((index + 1) % 10) for index in range(10)},
+                **{0x59 + index: str((index + 1) % 10) for index in range(10)},
+                **{0x04 + index: letter for index, letter in enumerate("ABCDEF")},
+                0x14: "A"}
+    HID_ENTER = (0x28, 0x58)
+    HID_LOCKS = (0x39, 0x53) # Caps Lock and Num Lock
+
+    def __init__(self, loggers, path:str=None, fd:int=None, mode:str=None,
+                 grab:bool=True, framer:ScanFramer=None,
+                 decoder:LayoutDetector=None) -> None:
+        """
+        RFIDReader's constructor.
+        Reads the device at `path`, or the file descriptor `fd`.
+        The mode is guessed from the path if it isn't given.
+        """
+        super().__init__("RFIDReader", join_timeout=self.POLL_TIMEOUT * 2)
+        self.loggers = loggers
+        self.path = path
+        self.fd = fd
+        self.mode = mode or self.guess_mode(path)
+        self.grab = grab
+        self.scans = queue.Queue()
+        self.framer = framer or ScanFramer(loggers)
+        self.decoder = decoder or LayoutDetector(loggers)
+        self._pending = b""
+        self._pressed = set() # hidraw: keys held in the last report
+
+    @classmethod
+    def guess_mode(cls, path:str=None) -> str:
+        """
+        Returns the mode matching the device's path.
+        """
+        name = os.path.basename(os.path.realpath(path)) if path else ""
+        if name.startswith("event"):
+            return cls.EVDEV
+        if name.startswith("hidraw"):
+            return cls.HIDRAW
+        return cls.TEXT
+
+    def open(self) -> bool:
+        """
+        Opens the device, if the reader was given a path.
+        Returns True if there is a descriptor to read.
+        """
+        if self.fd is not None:
+            return True
+        try:
+            self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as err:
+            self.loggers.log.error("RFID reader %s can't be opened: %s", self.path, err)
+            return False
+        if self.mode == self.EVDEV and self.grab:
+            # Keeps the scans away from the window and its text fields
+            try:
+                import fcntl
+                fcntl.ioctl(self.fd, self.EVIOCGRAB, 1)
+            except (ImportError, OSError) as err:
+                self.loggers.log.warning("RFID reader not grabbed: %s", err)
+        self.loggers.log.info("RFID reader %s opened (%s).", self.path, self.mode)
+        return True
+
+    def _close_fd(self) -> None:
+        """
+        Closes the device opened by the reader.
+        """
+        if self.path is not None and self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+    def feed(self, data:bytes, timestamp:float=None) -> None:
+        """
+        Decodes bytes read from the device at the given time
+        and queues the scans completed.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        match self.mode:
+            case self.EVDEV:
+                self._feed_evdev(data)
+            case self.HIDRAW:
+                self._feed_hidraw(data, timestamp)
+            case _:
+                for char in data.decode("utf-8", errors="replace"):
+                    if char in "\r\n":
+                        self.end_scan(timestamp)
+                    else:
+                        self.framer.key(char, timestamp)
+
+    def _feed_evdev(self, data:bytes) -> None:
+        """
+        Decodes input events: only key presses are kept,
+        timed by the kernel. A key not mapped spoils its frame.
+        """
+        data = self._pending + data
+        size = self.EVENT.size
+        end = len(data) - len(data) % size
+        self._pending = data[end:]
+        for sec, usec, event_type, code, value in self.EVENT.iter_unpack(data[:end]):
+            if event_type != self.EV_KEY or value != 1:
+                continue
+            timestamp = sec + usec / 1e6
+            if code in self.EVDEV_ENTER:
+                self.end_scan(timestamp)
+            elif code not in self.EVDEV_MODIFIERS:
+                self.framer.key(self.EVDEV_KEYS.get(code, self.UNKNOWN_KEY), timestamp)
+
+    def _feed_hidraw(self, data:bytes, timestamp:float) -> None:
+        """
+        Decodes keyboard reports: a key is pressed when it appears in a report.
+        A key not mapped spoils its frame.
+        """
+        data = self._pending + data
+        size = self.REPORT_SIZE
+        end = len(data) - len(data) % size
+        self._pending = data[end:]
+        for start in range(0, end, size):
+            keys = [key for key in data[start + 2:start + size] if key]
+            for key in keys:
+                if key in self._pressed:
+                    continue
+                if key in self.HID_ENTER:
+                    self.end_scan(timestamp)
+                elif key not in self.HID_LOCKS:
+                    self.framer.key(self.HID_KEYS.get(key, self.UNKNOWN_KEY), timestamp)
+            self._pressed = set(keys)
+
+    def end_scan(self, timestamp:float) -> None:
+        """
+        Queues the card number of the frame ended, if it is a scan
+        (None if it can't be read).
+        """
+        frame = self.framer.enter(timestamp)
+        if frame is not None:
+            self.scans.put(self.decoder.decode(frame))
+
+    def _run(self) -> None:
+        """
+        Body of the reading thread.
+        """
+        while not self._stop.is_set():
+            if self.fd is None and not self.open():
+                self._stop.wait(self.RETRY_INTERVAL)
+                continue
+            try:
+                readable, _, _ = select.select([self.fd], [], [], self.POLL_TIMEOUT)
+                if not readable:
+                    continue
+                data = os.read(self.fd, 4096)
+            except OSError as err:
+                self.loggers.log.error("RFID reader lost: %s", err)
+                data = b""
+            if data:
+                self.feed(data)
+                continue
+            # End of file: the device is gone (or the pipe is closed).
+            if self.path is None:
+                self.loggers.log.warning("RFID reader closed.")
+                return
+            self._close_fd()
+            self._stop.wait(self.RETRY_INTERVAL)
+
+    def get(self) -> tuple:
+        """
+        Returns whether a scan was queued and its card number (None if
+        it can't be read). Must be called from the Tk thread.
+        """
+        try:
+            return True, self.scans.get_nowait()
+        except queue.Empty:
+            return False, None
+
+    def stop(self) -> None:
+        """
+        Stops the reading thread and closes the device.
+        """
+        super().stop()
+        self._close_fd()
@@ -0,0 +1,91 @@
+"""
+scan_framer.py
+
+Defines the ScanFramer class, which tells the scans
+of the RFID reader from the other keystrokes.
+"""
+
+#------------------------------------------------------------#
+
+from collections import Counter
+
+#------------------------------------------------------------#
+
+class ScanFramer:
+    """
+    Cuts the keystrokes received into scans.
+
+    The reader types a whole card number in a burst, a few milliseconds
+    between two keys, then Enter. A key coming after a longer gap starts
+    a new frame: the keys typed before it (by hand, or a scan whose
+    Enter was lost) are dropped. A frame is only accepted if its Enter
+    comes in the burst and it is long enough. A card scanned again
+    within DUPLICATE_WINDOW is ignored.
+    """
+    MAX_KEY_GAP = 0.05 # Seconds between two keys of a scan
+    MIN_LENGTH = 4 # Keys of the shortest card number
+    DUPLICATE_WINDOW = 1.5 # Seconds during which a card scanned again is ignored
+
+    def __init__(self, loggers, max_key_gap:float=MAX_KEY_GAP,
+                 min_length:int=MIN_LENGTH,
+                 duplicate_window:float=DUPLICATE_WINDOW) -> None:
+        """
+        ScanFramer's constructor.
+        """
+        self.loggers = loggers
+        self.max_key_gap = max_key_gap
+        self.min_length = min_length
+        self.duplicate_window = duplicate_window
+        self.frame = ""
+        self.last_key = None # Time of the last key of the frame
+        self.last_scan = (None, None) # Last frame accepted and its time
+        self.accepted = 0
+        self.rejected = Counter() # reason -> number of frames rejected
+
+    def reject(self, reason:str, frame:str) -> None:
+        """
+        Counts a frame rejected.
+        """
+        self.rejected[reason] += 1
+        self.loggers.log.debug("RFID frame %r rejected (%s).", frame, reason)
+
+    def key(self, char:str, timestamp:float) -> None:
+        """
+        Adds a key to the frame, or starts a new frame
+        if it comes too long after the previous key.
+        """
+        if not char:
+            return # Modifier keys
+        if self.frame and timestamp - self.last_key > self.max_key_gap:
+            self.reject("timeout", self.frame)
+            self.frame = ""
+        self.frame += char
+        self.last_key = timestamp
+
+    def enter(self, timestamp:float) -> str:
+        """
+        Ends the frame. Returns it if it is a scan, None otherwise.
+        """
+        frame, self.frame = self.frame, ""
+        if not frame:
+            return None
+        if timestamp - self.last_key > self.max_key_gap:
+            self.reject("timeout", frame)
+            return None
+        if len(frame) < self.min_length:
+            self.reject("short", frame)
+            return None
+
+        last_frame, last_time = self.last_scan
+        self.last_scan = (frame, timestamp)
+        if frame == last_frame and timestamp - last_time < self.duplicate_window:
+            self.reject("duplicate", frame)
+            return None
+        self.accepted += 1
+        return frame
+
+    def stats(self) -> dict:
+        """
+        Returns the number of scans accepted and of frames rejected by reason.
+        """
+        return {"accepted": self.accepted, **self.rejected}
@@ -6,7 +6,7 @@ Configure MarcoNeo's history page.
 
 #-------------------------------------------------------------------#
 
-from src.utils.gui_utils import AppLabel, ImageButton, AppFrame, Frame
+from src.utils.gui_utils import AppLabel, AppButton, ImageButton, AppFrame, Frame
 from src.interface.widgets.hist_item import HistoryItem
 
 #-------------------------------------------------------------------#
@@ -14,16 +14,27 @@ from src.interface.widgets.hist_item import HistoryItem
 class HistoryMenu(AppFrame):
     """
     MarcoNeo's history page.
+
+    The page is a virtualized view over the orders retrieved so far:
+    MAX_HISTORY rows are built once and re-bound to the orders
+    visible at the current offset. Older orders are retrieved
+    page by page when the view scrolls past the ones loaded.
     """
-    MAX_HISTORY = 10
+    MAX_HISTORY = 10 # Rows displayed, and orders retrieved per request
     def __init__(self, gui=None) -> None:
         super().__init__(gui)
         self.gui = gui
+        self.orders = [] # Orders retrieved so far, newest first
+        self.offset = 0 # Index in orders of the first row displayed
+        self.exhausted = False # True once the oldest order is retrieved
+        self.loading = False
+        self.rows = []
         self.setup_headers()
         self.setup_buttons()
         self.history_frame = Frame(self, borderwidth=5, border=5, bg="black",
                                    highlightbackground="#4d88ff", highlightthickness=5)
         self.history_frame.pack(expand=True, fill="both", padx=10, pady=(100, 10))
+        self.setup_history()
 
     def setup_headers(self) -> None:
         """
@@ -42,29 +53,131 @@ class HistoryMenu(AppFrame):
                                   command=lambda: self.gui.change_menu(self.gui.main_menu))
         self.refresh_btn = ImageButton(self, image=self.gui.refresh,
                                         command=self.refresh_history)
+        self.newer_btn = AppButton(self, text="▲", command=self.newer_page)
+        self.older_btn = AppButton(self, text="▼", command=self.older_page)
         self.back_btn.place(relx=0.02, rely=0.01, anchor="nw")
         self.refresh_btn.place(relx=0.98, rely=0.01, anchor="ne")
+        self.newer_btn.place(relx=0.13, rely=0.03, anchor="nw")
+        self.older_btn.place(relx=0.87, rely=0.03, anchor="ne")
         return True
 
     def setup_history(self) -> None:
         """
-        Defines the history used in the history menu.
+        Builds the rows of the history once.
+        """
+        for _ in range(self.MAX_HISTORY):
+            row = HistoryItem(self.history_frame)
+            row.pack(expand=True, fill='x', pady=5)
+            self.rows.append(row)
+        for widget in (self, self.history_frame):
+            widget.bind("<MouseWheel>",
+                        lambda event: self.scroll(-1 if event.delta > 0 else 1))
+            widget.bind("<Button-4>", lambda _event: self.scroll(-1))
+            widget.bind("<Button-5>", lambda _event: self.scroll(1))
+
+    def display_history(self) -> None:
         """
-        history = self.gui.app.db_cursor.get_history()
-        for item_purchased in history:
-            HistoryItem(self.history_frame,
-                        item_purchased).pack(expand=True, fill='x', pady=5)
+        Binds the rows to the orders visible at the current offset.
+        """
+        for index, row in enumerate(self.rows, start=self.offset):
+            if index < len(self.orders):
+                row.bind_order(self.orders[index])
+            else:
+                row.clear_order()
+
     def refresh_history(self):
         """
-        Refesh history on the page
+        Refesh history on the page, back to the newest orders.
+        Only the orders placed since the newest one retrieved are asked for.
+        The history is retrieved off the Tk thread.
         """
-        self.clear_history()
-        self.setup_history()
+        if not self.orders:
+            self.gui.app.db_worker.submit(self.gui.app.db_cursor.get_history,
+                                          limit=self.MAX_HISTORY,
+                                          callback=self.reset_orders)
+            return
+        newest = (self.orders[0][4], self.orders[0][5])
+        self.gui.app.db_worker.submit(self.gui.app.db_cursor.get_history,
+                                      limit=self.MAX_HISTORY, after=newest,
+                                      callback=self.prepend_orders)
+
+    def reset_orders(self, history:list) -> None:
+        """
+        Replaces the orders retrieved by the given ones.
+        """
+        self.orders = list(history)
+        self.exhausted = len(history) < self.MAX_HISTORY
+        self.offset = 0
+        self.display_history()
         self.gui.app.loggers.log.info("History have been refreshed.")
 
-    def clear_history(self):
+    def prepend_orders(self, history:list) -> None:
+        """
+        Adds the orders placed since the last refresh on top of the history.
+        """
+        if len(history) == self.MAX_HISTORY:
+            # There may be more new orders than retrieved: start over.
+            self.reset_orders(history)
+            return
+        self.orders[:0] = history
+        self.offset = 0
+        self.display_history()
+        self.gui.app.loggers.log.info("History have been refreshed (%s new orders).",
+                                      len(history))
+
+    def scroll(self, step:int) -> None:
+        """
+        Moves the view by the given number of rows (positive is older).
+        Retrieves the next orders if the view goes past the ones loaded.
+        """
+        if self.loading:
+            return
+        offset = max(0, self.offset + step)
+        if offset + self.MAX_HISTORY > len(self.orders) and not self.exhausted and self.orders:
+            self.loading = True
+            oldest = (self.orders[-1][4], self.orders[-1][5])
+            self.gui.app.db_worker.submit(self.gui.app.db_cursor.get_history,
+                                          limit=self.MAX_HISTORY, before=oldest,
+                                          callback=lambda history: self.append_orders(history,
+                                                                                      offset),
+                                          errback=self.loading_failed)
+            return
+        self.move_to(offset)
+
+    def append_orders(self, history:list, offset:int) -> None:
+        """
+        Adds older orders at the end of the history and moves the view.
+        """
+        self.loading = False
+        self.orders.extend(history)
+        self.exhausted = len(history) < self.MAX_HISTORY
+        self.move_to(offset)
+
+    def loading_failed(self, error:BaseException) -> None:
+        """
+        Logs a retrieval of older orders that failed.
+        """
+        self.loading = False
+        self.gui.app.db_worker.log_error(error)
+
+    def move_to(self, offset:int) -> None:
+        """
+        Displays the orders from the given offset, within the ones loaded.
+        """
+        offset = min(offset, max(0, len(self.orders) - self.MAX_HISTORY))
+        if offset == self.offset:
+            return
+        self.offset = offset
+        self.display_history()
+
+    def older_page(self) -> None:
+        """
+        Scrolls back to the previous orders.
+        """
+        self.scroll(self.MAX_HISTORY)
+
+    def newer_page(self) -> None:
         """
-        Clear history on the page
+        Scrolls forward to the next orders.
         """
-        for widget in self.history_frame.winfo_children():
-            widget.destroy()
+        self.scroll(-self.MAX_HISTORY)
@@ -90,8 +90,12 @@ class MainMenu(AppFrame):
 
         # Fresh new start
         self.gui.app.current_user.logout()
-        self.gui.shopping_menu = ShoppingMenu(self.gui)
+        if self.gui.shopping_menu is None:
+            self.gui.shopping_menu = ShoppingMenu(self.gui)
+        else:
+            self.gui.shopping_menu.rebind(self.gui.app.config)
         self.gui.change_menu(self.gui.shopping_menu)
+        self.gui.app.resume_session()
 
     def switch_config(self) -> None:
         """
@@ -20,7 +20,8 @@ class SettNavbar(Frame):
         self.config(bg="#000000")
         self.back_btn = None
         self.product_type = self.manager.manager.gui.app.config.api_config.categories
-        self.current_toggle = self.product_type[0]
+        # None while the catalog is empty (first boot offline)
+        self.current_toggle = self.product_type[0] if self.product_type else None
         self.setup_buttons()
 
     def setup_buttons(self) -> bool:
@@ -38,6 +39,19 @@ class SettNavbar(Frame):
 
         self.back_btn.pack(side="bottom", pady=10, padx=10, fill="x")
 
+    def rebuild(self) -> None:
+        """
+        Rebuilds the buttons from the categories of the API,
+        keeping the current toggle if it still exists.
+        """
+        for widget in self.winfo_children():
+            widget.destroy()
+        self.product_type = self.manager.manager.gui.app.config.api_config.categories
+        if self.current_toggle not in self.product_type:
+            self.current_toggle = self.product_type[0] if self.product_type else None
+        self.setup_buttons()
+        self.toggle(self.current_toggle)
+
     def toggle(self, toggle: str) -> None:
         """
         Changes the current toggle of the navbar.
@@ -6,7 +6,7 @@ Body of the settings page of the app.
 
 #-------------------------------------------------------------------#
 
-from src.utils.gui_utils import Frame
+from src.utils.gui_utils import Frame, Label
 from src.interface.widgets.sett_item import SettItem
 
 #-------------------------------------------------------------------#
@@ -34,8 +34,7 @@ class SettBody(Frame):
         """
         row, column = 0, 0
         for item in items:
-            title = item["title"]
-            item_frame = SettItem(self, title, self.is_selected(title))
+            item_frame = SettItem(self, item)
             item_frame.grid(row=row, column=column, padx=5, pady=5, sticky="nsew")
             # Actualise the grid
             self.grid_columnconfigure(column, weight=1)
@@ -49,8 +48,13 @@ class SettBody(Frame):
     def update_body(self, toggle) -> None:
         """
         Updates the items displayed in the body.
+        Without any category (empty catalog), a message is displayed instead.
         """
         self.clear_body()
+        if toggle is None:
+            Label(self, text="Catalogue indisponible.", font=("System", 20, "bold"),
+                  bg="black", fg="white").grid(row=0, column=0)
+            return
         items_to_display = self.settings_manager.retrieve_settings_items(toggle)
         self.display_items(items_to_display)
 
@@ -60,13 +64,3 @@ class SettBody(Frame):
         """
         for child in self.winfo_children():
             child.destroy()
-
-    def is_selected(self, title:str=None) -> bool:
-        """
-        Returns True if the item is selected, else False.
-        """
-        for prod_type in self.settings_manager.gui.app.config.api_config.config_json:
-            for product in prod_type["products"]:
-                if product["title"] == title:
-                    return product["selected"]
-        return None
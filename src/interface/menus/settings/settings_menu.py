@@ -43,13 +43,7 @@ class SettingsMenu(AppFrame):
         Retrieves from api_config.json the items
         following the toggle.
         """
-        data = self.gui.app.config.api_config.config_json
-        items = []
-        for menu in data:
-            if menu["product_type"] == toggle:
-                items = menu["products"]
-                break
-        return items
+        return self.gui.app.config.api_config.config_json.products(toggle)
 
     def refresh(self):
         """
@@ -57,3 +51,12 @@ class SettingsMenu(AppFrame):
         """
         self.gui.app.config.api_config.setup_jsons()
         self.right_grid.body.update_body(self.left_grid.navbar.current_toggle)
+
+    def update_catalog(self, changed_types:set, categories_changed:bool) -> None:
+        """
+        Updates the page after a change of the catalog.
+        """
+        if categories_changed:
+            self.left_grid.navbar.rebuild()
+        elif self.left_grid.navbar.current_toggle in changed_types:
+            self.right_grid.body.update_body(self.left_grid.navbar.current_toggle)
@@ -40,6 +40,16 @@ class Navbar(Frame):
 
         return True
 
+    def rebuild(self) -> None:
+        """
+        Rebuilds the buttons from the product types of the config.
+        """
+        for widget in self.winfo_children():
+            widget.destroy()
+        self.product_types = self.manager.manager.gui.app.config.get_product_types()
+        self.current_toggle = self.product_types[0]
+        self.setup_buttons()
+
     def toggle(self, toggle: str) -> None:
         """
         Changes the current toggle of the navbar.
@@ -9,6 +9,7 @@ to enter the new prices.
 #-------------------------------------------------------------------#
 
 from src.utils.gui_utils import Frame, ImageButton, LabelLabelPair
+from src.utils.money import Money
 
 #-------------------------------------------------------------------#
 
@@ -37,7 +38,18 @@ class PriceModifier(Frame):
         self.list_frame.pack(side='left', padx=(115,0), pady=10)
         self.control_frame.pack(side='left', padx=0, pady=10, fill="both", expand=True)
 
-        # Widgets
+        # The keyboard and its images are only loaded when first shown.
+        self.built = False
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=3)
+        self.display_item_list()
+
+    def build(self):
+        """
+        Builds the digital keyboard and the buttons.
+        """
         self.setup_digital_keyboard()
         enter_button = ImageButton(self.control_frame,
                                    image=self.shopping_manager.gui.priceconfirm,
@@ -53,16 +65,14 @@ class PriceModifier(Frame):
         reset_btn.pack(side="top", padx=10, pady=(0, 145))
         back_btn.pack(side="top", padx=10, pady=(145, 0))
         self.reset_frame.place(relx=0.08, rely=0.5, anchor="center")
-
-        self.rowconfigure(0, weight=1)
-        self.columnconfigure(0, weight=1)
-        self.columnconfigure(1, weight=3)
-        self.display_item_list()
+        self.built = True
 
     def show(self):
         """
         Shows the price modifier.
         """
+        if not self.built:
+            self.build()
         self.pack(side="top", fill="both", expand=True)
         self.manager.columnconfigure(0, weight=1)
         self.manager.rowconfigure(0, weight=1)
@@ -106,6 +116,11 @@ class PriceModifier(Frame):
         new_price = focused_widget.entry.cget("text")
         if new_price == "":
             return
+        try:
+            new_price = str(Money.parse(new_price))
+        except ValueError:
+            self.loggers.log.warning("Invalid price %s.", new_price)
+            return
 
         focused_widget.price = new_price
         focused_widget.entry.configure(text=new_price)
@@ -188,9 +203,9 @@ class PriceModifier(Frame):
         # Display the items
         for item in items:
             LabelLabelPair(self.list_frame,
-                           name=item["name"],
-                           price=str(item["price"]),
-                           color=item["color"]).pack(fill="both", expand=True,
+                           name=item.name,
+                           price=str(item.price),
+                           color=item.color).pack(fill="both", expand=True,
                                                           side="top", padx=5, pady=5)
 
     def get_focused_item(self):
@@ -208,6 +223,7 @@ class PriceModifier(Frame):
         """
         current_toggle = self.shopping_manager.left_grid.navbar.current_toggle
         self.shopping_manager.gui.app.config.change_price(current_toggle, item.name, new_price)
+        self.shopping_manager.right_grid.body.invalidate(current_toggle)
         self.loggers.log.debug("Price of item %s has been changed to %s.",
                                item.name, new_price)
 
@@ -216,6 +232,10 @@ class PriceModifier(Frame):
         Resets the price.
         """
         config_manager = self.manager.manager.gui.app.config
-        config_manager.loaded_config = config_manager.load(
-            self.manager.manager.gui.app.config.name)
+        try:
+            config_manager.loaded_config = config_manager.load(config_manager.name)
+        except ValueError:
+            self.manager.manager.gui.app.close()
+            return
+        self.shopping_manager.right_grid.body.invalidate()
         self.display_item_list()
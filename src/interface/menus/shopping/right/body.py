@@ -6,7 +6,7 @@ Configure MarcoNeo's body on its shopping menu.
 
 #-------------------------------------------------------------------#
 
-from src.utils.gui_utils import AppFrame, Frame
+from src.utils.gui_utils import AppFrame, Frame, Label
 from src.interface.widgets.shop_item import ShopItem
 
 #-------------------------------------------------------------------#
@@ -14,6 +14,10 @@ from src.interface.widgets.shop_item import ShopItem
 class Body(AppFrame):
     """
     Contains the items to be displayed in the shopping page.
+
+    The grid of items of each toggle is built once and cached:
+    switching toggles only swaps the grid displayed and resets
+    the amounts of its items.
     """
     def __init__(self, manager=None):
         super().__init__(manager)
@@ -23,29 +27,35 @@ class Body(AppFrame):
         self.propagate(False)
         self.configure(bg="black")
         self.item_per_row = 4
-        self.frame = None
+        self.frame = None # Frame displayed in the body
+        self.grids = {} # toggle -> (frame, items)
+        self.stale = set() # Toggles whose grid is rebuilt when next displayed
+
+        # Popup frame used by the footer to confirm a purchase.
+        self.popup = Frame(self, bg="black")
+        self.refill_lbl = Label(self, image=self.shopping_manager.gui.refill_lbl,
+                                bg="black")
 
         self.update_body(self.shopping_manager.left_grid.navbar.current_toggle)
 
-    def display_items(self, items):
+    def display_items(self, items) -> tuple:
         """
         Displays the items in the shop.
 
-        Dynamically creates the ShopItem objects.
+        Dynamically creates the ShopItem objects in a new grid frame.
+        Returns the frame and its items.
         """
         count = 1
         row, column = 0, 0
         custom_bool = self.shopping_manager.gui.app.config.name == self.shopping_manager.gui.app.config.CUSTOM
-        self.frame = Frame(self, bg="black")
-        self.frame.place(relx=0.5, rely=0.5, anchor="center")
+        frame = Frame(self, bg="black")
+        shop_items = []
         for item in items:
             if custom_bool:
-                if not item["selected"]:
+                if not item.selected:
                     continue
-            name = item["title"]
-            setattr(self, f"{name}_item",
-                    ShopItem(name, item["price"], item["id"], self.frame, item["color"]))
-            item_frame = getattr(self, f"{name}_item")
+            item_frame = ShopItem(item.title, item.price, item.id, frame, item.color)
+            shop_items.append(item_frame)
             item_frame.grid(row=row, column=column, padx=20, pady=5)
             self.grid_columnconfigure(column, weight=1)
             self.grid_rowconfigure(row, weight=1)
@@ -59,6 +69,42 @@ class Body(AppFrame):
                 break
 
             count += 1
+        self.show(frame)
+        return frame, shop_items
+
+    def show_grid(self, toggle) -> None:
+        """
+        Displays the grid of items of the toggle, built on first use.
+        """
+        if toggle in self.stale:
+            self.stale.discard(toggle)
+            self.invalidate(toggle)
+        if toggle not in self.grids:
+            items_to_display = self.shopping_manager.retrieve_shopping_items(toggle)
+            self.grids[toggle] = self.display_items(items_to_display)
+            return
+
+        frame, shop_items = self.grids[toggle]
+        for shop_item in shop_items:
+            shop_item.reset()
+        self.show(frame)
+
+    def show(self, frame) -> None:
+        """
+        Displays the given frame in place of the current one.
+        """
+        self.clear_body()
+        self.frame = frame
+        self.frame.place(relx=0.5, rely=0.5, anchor="center")
+
+    def show_popup(self) -> Frame:
+        """
+        Displays the popup frame, emptied, and returns it.
+        """
+        for widget in self.popup.winfo_children():
+            widget.destroy()
+        self.show(self.popup)
+        return self.popup
 
     def update_body(self, toggle):
         """
@@ -70,12 +116,37 @@ class Body(AppFrame):
             return
         else:
             self.shopping_manager.refill_bool = False
-        items_to_display = self.shopping_manager.retrieve_shopping_items(toggle)
-        self.display_items(items_to_display)
+        self.show_grid(toggle)
 
     def clear_body(self):
         """
         Clears the body.
         """
-        for child in self.winfo_children():
-            child.destroy()
+        if self.frame is not None:
+            self.frame.place_forget()
+            self.frame = None
+        self.refill_lbl.place_forget()
+
+    def invalidate(self, toggle=None) -> None:
+        """
+        Drops the cached grid of a toggle (of every toggle if None)
+        so that it is built again from the config.
+        """
+        if toggle is None:
+            self.stale.clear()
+        toggles = list(self.grids) if toggle is None else [toggle]
+        for key in toggles:
+            if key not in self.grids:
+                continue
+            frame, _ = self.grids.pop(key)
+            if frame is self.frame:
+                self.frame = None
+            frame.destroy()
+
+    def mark_stale(self, toggles) -> None:
+        """
+        Marks the grids of the toggles as outdated by a new catalog.
+        They are rebuilt the next time they are displayed, so that
+        the grid in use isn't replaced in the middle of a purchase.
+        """
+        self.stale.update(toggles)
@@ -7,6 +7,7 @@ Describes the footer of the shopping menu.
 #-------------------------------------------------------------------#
 
 from src.utils.gui_utils import Frame, Label, ImageButton
+from src.server.db_cursor import InsufficientFunds, BalanceConflict
 
 #-------------------------------------------------------------------#
 
@@ -16,6 +17,8 @@ class Footer(Frame):
     Contains the confirm button and the reset button
     and the total of the cart.
     """
+    ERROR_DELAY = 3000 # Milliseconds during which a payment error is shown
+
     def __init__(self, manager=None):
         super().__init__(manager)
         self.manager = manager
@@ -59,7 +62,7 @@ class Footer(Frame):
         self.cart_img = Label(cart_frame, image=self.shopping_manager.gui.cart,
                               bg="black", border=0,
                               borderwidth= 0, highlightthickness=0)
-        self.total_label = Label(cart_frame, text=f"{self.cart.total} €",
+        self.total_label = Label(cart_frame, text=self.cart.total.format(separator=" "),
                                  font=("System", 20, "bold"), bg="black", fg="white")
         self.cart_img.pack(side="left", padx=10)
         self.total_label.pack(side="left", padx=10)
@@ -83,7 +86,7 @@ class Footer(Frame):
         """
         Updates the total label.
         """
-        self.total_label.configure(text=f"{self.cart.total} €")
+        self.total_label.configure(text=self.cart.total.format(separator=" "))
 
         # If the cart is empty, the back button is displayed.
         # Else, the discard button is displayed.
@@ -123,19 +126,17 @@ class Footer(Frame):
         for widget in self.manager.manager.left_grid.navbar.winfo_children():
             widget.configure(state="disabled")
 
-        for widget in self.manager.body.frame.winfo_children():
-            widget.destroy()
-
         # Popup displayed when confirming a purchase.
-        debiter_lbl = Label(self.manager.body.frame,
+        popup = self.manager.body.show_popup()
+        debiter_lbl = Label(popup,
                             bg="black", highlightthickness=0, borderwidth=0)
         if self.shopping_manager.gui.app.cart.total>0:
             debiter_lbl.configure(image=self.shopping_manager.gui.debiter)
         else:
             debiter_lbl.configure(image=self.shopping_manager.gui.recharger_lbl)
 
-        debiter_total = Label(self.manager.body.frame,
-                                   text=f"{self.shopping_manager.gui.app.cart.total} €",
+        debiter_total = Label(popup,
+                                   text=self.shopping_manager.gui.app.cart.total.format(separator=" "),
                                     font=("System", 40, "bold"), bg="black", fg="gold")
 
         debiter_lbl.grid(row=0, column=0, columnspan=2, pady=5)
@@ -148,9 +149,6 @@ class Footer(Frame):
         """
         Cancels the purchase.
         """
-        for widget in self.manager.body.frame.winfo_children():
-            widget.destroy()
-
         for widget in self.manager.manager.left_grid.navbar.winfo_children():
             widget.configure(state="normal")
 
@@ -159,20 +157,81 @@ class Footer(Frame):
         self.confirm_btn.configure(command=self.confirm_purchase)
         self.reset()
 
+    def lock_page(self, locked:bool) -> None:
+        """
+        Disables the navigation of the page while a payment is in progress,
+        or enables it back.
+        """
+        state = "disabled" if locked else "normal"
+        header = self.manager.header
+        for widget in (*self.manager.manager.left_grid.navbar.winfo_children(),
+                       self.back_btn, self.confirm_btn,
+                       header.logout_btn, header.price_modifier_btn):
+            widget.configure(state=state)
+
     def do_purchase(self):
         """
         Does the purchase.
         """
-        self.manager.body.frame.place_forget()
+        app = self.shopping_manager.gui.app
+        self.manager.body.clear_body()
         self.confirm_frame.place_forget()
-        for widget in self.manager.manager.left_grid.navbar.winfo_children():
-            widget.configure(state="normal")
 
-        self.shopping_manager.gui.app.payment_service.purchase()
+        # The page is locked and the scans ignored until the payment is over.
+        self.lock_page(True)
+        app.payment_in_progress = True
+
+        # The payment is done off the Tk thread, on a copy of the member and the cart.
+        checkout = app.payment_service.checkout(app.current_user, app.cart)
+        app.db_worker.submit(app.payment_service.purchase, checkout,
+                             callback=self.end_purchase, errback=self.purchase_failed)
+
+    def purchase_failed(self, error:BaseException) -> None:
+        """
+        Shows why a payment failed and gives the page back with the same cart.
+        """
+        self.loggers.log.error("Purchase failed: %s: %s", type(error).__name__, error)
+        if isinstance(error, InsufficientFunds):
+            message = "Solde insuffisant."
+        elif isinstance(error, BalanceConflict):
+            message = "Paiement refusé,\nscannez à nouveau la carte."
+        else:
+            message = "Erreur lors du paiement,\nveuillez réessayer."
+        self.end_purchase(False, message)
+
+    def end_purchase(self, paid:bool=True, message:str="Paiement impossible.") -> None:
+        """
+        Gives the page back once the payment is over.
+        A cart that hasn't been paid is kept, with the member.
+        """
+        self.shopping_manager.gui.app.payment_in_progress = False
+        self.lock_page(False)
+        self.confirm_btn.configure(command=self.confirm_purchase)
+        if not paid:
+            self.show_error(message)
+            return
+
         self.shopping_manager.gui.app.cart.reset()
         self.loggers.log.debug("Cart has been reset.")
         self.shopping_manager.gui.app.update_user()
         self.shopping_manager.right_grid.body.update_body(
             self.shopping_manager.left_grid.navbar.current_toggle)
         self.reset()
-        self.confirm_btn.configure(command=self.confirm_purchase)
+
+    def show_error(self, message:str) -> None:
+        """
+        Shows a message in the body for ERROR_DELAY milliseconds,
+        then the items again.
+        """
+        popup = self.manager.body.show_popup()
+        Label(popup, text=message, font=("System", 20, "bold"),
+              bg="black", fg="red").grid(row=0, column=0, pady=5)
+        self.after(self.ERROR_DELAY, self.hide_error, popup)
+
+    def hide_error(self, popup:Frame) -> None:
+        """
+        Displays the items again, unless the body changed meanwhile.
+        """
+        if self.manager.body.frame is popup:
+            self.manager.body.update_body(self.shopping_manager.left_grid.navbar.current_toggle)
+        self.update_footer()
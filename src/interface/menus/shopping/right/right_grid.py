@@ -49,7 +49,7 @@ class RightGrid(Frame):
         """
         Opens the price modifier.
         """
-        self.price_modifier.pack(side="top", fill="both", expand=True)
+        self.price_modifier.show()
         self.header.grid_forget()
         self.body.grid_forget()
         self.footer.grid_forget()
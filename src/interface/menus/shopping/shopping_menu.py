@@ -8,13 +8,16 @@ Configure MarcoNeo's shopping page.
 
 from src.interface.menus.shopping.left.left_grid import LeftGrid
 from src.interface.menus.shopping.right.right_grid import RightGrid
-from src.utils.gui_utils import Frame, Label
+from src.utils.gui_utils import Frame
 
 #-------------------------------------------------------------------#
 
 class ShoppingMenu(Frame):
     """
     Menu for the shopping page.
+
+    The page is built once and kept alive: loading the Marco again
+    only rebinds it to the config (see `rebind`).
     """
     def __init__(self, gui=None) -> None:
         super().__init__(gui)
@@ -36,15 +39,66 @@ class ShoppingMenu(Frame):
         self.grid_columnconfigure(1, weight=4)
         self.grid_rowconfigure(0, weight=1)
 
+        # What the widgets built depend on in the config
+        self.signature = self.config_signature(self.gui.app.config)
+
+    @staticmethod
+    def config_signature(config) -> tuple:
+        """
+        Returns what the page depends on in the config: its name,
+        its toggles and the products (and prices) displayed in them.
+        """
+        return (config.name, tuple(config.get_product_types()),
+                tuple((product_type,
+                       tuple((product.id, product.title, product.price,
+                              product.color, product.selected)
+                             for product in config.loaded_config.products(product_type)))
+                      for product_type in config.loaded_config.categories()))
+
+    def rebind(self, config) -> bool:
+        """
+        Prepares the page for a new session with the given config.
+        The widgets depending on the catalog are only rebuilt
+        if the config changed since they were built.
+        Returns True if they were rebuilt.
+        """
+        signature = self.config_signature(config)
+        changed = signature != self.signature
+        if changed:
+            self.signature = signature
+            self.left_grid.navbar.rebuild()
+            self.right_grid.body.invalidate()
+            self.gui.loggers.log.debug("Shopping menu rebuilt for config %s.", config.name)
+        self.reset()
+        return changed
+
+    def reset(self) -> None:
+        """
+        Puts the page back in its initial state:
+        empty cart, no member and first toggle selected.
+        """
+        navbar = self.left_grid.navbar
+        footer = self.right_grid.footer
+        if self.right_grid.price_modifier.winfo_manager():
+            self.right_grid.price_modifier.back()
+
+        # A purchase may have been left unconfirmed
+        footer.confirm_frame.place_forget()
+        footer.confirm_btn.configure(command=footer.confirm_purchase)
+        for widget in navbar.winfo_children():
+            widget.configure(state="normal")
+
+        self.gui.app.cart.reset()
+        self.refill_bool = False
+        self.right_grid.header.member_card.update_card(self.gui.app.current_user)
+        navbar.toggle(navbar.product_types[0])
+        footer.update_footer()
+
     def retrieve_shopping_items(self, product_type:str) -> list:
         """
         Retrieves the items to display for a product_type given.
         """
-        products = []
-        for objet in self.gui.app.config.loaded_config:
-            if objet["product_type"] == product_type:
-                products = objet["products"]
-        return products
+        return self.gui.app.config.loaded_config.products(product_type)
 
     def refill_security(self):
         """
@@ -55,13 +109,10 @@ class ShoppingMenu(Frame):
         if self.refill_bool:
             self.display_refill()
         else:
-            Label(self.right_grid.body, image=self.gui.refill_lbl,
-            bg="black").place(relx=0.5, rely=0.5, anchor="center")
+            self.right_grid.body.refill_lbl.place(relx=0.5, rely=0.5, anchor="center")
 
     def display_refill(self):
         """
         Displays the refill page.
         """
-        self.right_grid.body.clear_body()
-        items_to_display = self.retrieve_shopping_items("Rechargement")
-        self.right_grid.body.display_items(items_to_display)
+        self.right_grid.body.show_grid("Rechargement")
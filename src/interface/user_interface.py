@@ -7,13 +7,14 @@ It is responsible for the GUI of the MarcoNeo application.
 
 #------------------------------------------------------------#
 
-import os
 import logging
 
 
 
 
-from src.utils.gui_utils import Tk, Frame, BOTH, Image, ImageTk, ImageOps, ImageFilter
+from src.utils.gui_utils import Tk, Frame, BOTH, AppFrame, AppLabel
+from src.utils.image_cache import ImageCache
+from src.utils.image_registry import ImageRegistry
 from src.interface.menus.main_menu import MainMenu
 from src.interface.menus.credits_menu import CreditsMenu
 from src.interface.menus.settings.settings_menu import SettingsMenu
@@ -30,6 +31,10 @@ class GUI(Tk):
     """
     Graphical User Interface of the application.
     """
+    STARTUP_POLL = 100 # Milliseconds between two checks of the startup
+    CATALOG_POLL = 1000 # Milliseconds between two checks of the catalog
+    RFID_POLL = 50 # Milliseconds between two checks of the RFID reader's scans
+
     def __init__(self, app) -> None:
         super().__init__()
         self.app = app
@@ -37,27 +42,84 @@ class GUI(Tk):
         self.protocol("WM_DELETE_WINDOW", self.app.close)
         self.main_menu = None
         self.shopping_menu = None
+        self.settings_menu = None
         self.history_menu = None
         self.stats_menu = None
-
-        self.bind("<Key>", self.app.rfid.rfid_callback) # Listen to the RFID reader
-        self.loggers.log.debug("RFID is listening.")
-
-        self.setup_window()
-        self.load_images()
-
-        self.shopping_menu = None
-        self.main_menu = MainMenu(self)
-        self.settings_menu = SettingsMenu(self)
-        self.credits_menu = CreditsMenu(self)
-        self.history_menu = HistoryMenu(self)
-        self.main_menu.pack(fill=BOTH, expand=True)
-        self.current_menu = self.main_menu
+        self.busy = False
 
         # Set the GUI reference in the application
         setattr(self.app, "gui", self)
+
+        # The window shows a loading page until the application is set up.
+        with self.app.timeline.phase("window"):
+            self.setup_window()
+            self.images = ImageRegistry(self, ImageCache(self.loggers), self.loggers)
+            self.register_images()
+            self.loading_menu = self.setup_loading_menu()
+            self.loading_menu.pack(fill=BOTH, expand=True)
+            self.current_menu = self.loading_menu
+            self.update()
+
+        # Menus which don't need the config are built meanwhile.
+        with self.app.timeline.phase("menus"):
+            self.main_menu = MainMenu(self)
+            self.credits_menu = CreditsMenu(self)
+            self.history_menu = HistoryMenu(self)
+
+        self.after(self.STARTUP_POLL, self.wait_startup)
         self.mainloop()
 
+    def setup_loading_menu(self) -> AppFrame:
+        """
+        Defines the page displayed while the application starts.
+        """
+        frame = AppFrame(self)
+        AppLabel(frame, image=self.logo).place(relx=0.5, rely=0.4, anchor="center")
+        self.loading_label = AppLabel(frame, text="Chargement...",
+                                      font=("System", 20, "bold"))
+        self.loading_label.place(relx=0.5, rely=0.75, anchor="center")
+        return frame
+
+    def startup_failed(self) -> None:
+        """
+        Displays on the loading page that the application can't start.
+        Touching the page closes the application.
+        """
+        self.loading_label.configure(text="Démarrage impossible.\nToucher l'écran pour quitter.",
+                                     fg="red")
+        for widget in (self.loading_menu, *self.loading_menu.winfo_children()):
+            widget.bind("<Button-1>", lambda _: self.app.close())
+
+    def wait_startup(self) -> None:
+        """
+        Waits for the config and the database, then
+        builds the last menus and displays the main menu.
+        """
+        if not self.app.startup_done():
+            self.after(self.STARTUP_POLL, self.wait_startup)
+            return
+
+        try:
+            self.app.finish_startup()
+            with self.app.timeline.phase("settings"):
+                self.settings_menu = SettingsMenu(self)
+        except Exception:
+            self.loggers.log.critical("MarcoNeo can't start.", exc_info=True)
+            self.startup_failed()
+            return
+
+        self.listen_rfid() # Listen to the RFID reader
+        self.loggers.log.debug("RFID is listening.")
+        if self.app.rfid.reader is not None:
+            self.app.rfid.start()
+            self.after(self.RFID_POLL, self.poll_rfid)
+        self.after(self.app.db_worker.POLL_INTERVAL, self.poll_db_worker)
+        self.after(self.CATALOG_POLL, self.poll_catalog)
+
+        self.change_menu(self.main_menu)
+        self.loading_menu.destroy()
+        self.app.timeline.report()
+
     def change_menu(self, next_menu: Frame) -> None:
         """
         This function changes the current view to the desired menu.
@@ -76,12 +138,68 @@ class GUI(Tk):
         self.current_menu.pack_forget()
 
         # Re-bind the keyboard
-        self.bind("<Key>", self.app.rfid.rfid_callback)
+        self.listen_rfid()
+
+        # Images of the previous menus may not be needed anymore, once they
+        # are torn down (the loading page is destroyed after the switch).
+        self.after_idle(self.images.trim_if_low_memory)
 
         # Update the current menu reference
         self.current_menu = next_menu
         self.loggers.log.debug(f"({type(next_menu).__name__})")
 
+    def poll_db_worker(self) -> None:
+        """
+        Hands the results of the database requests back to the GUI
+        and shows a busy cursor while some of them are running.
+        """
+        try:
+            self.app.db_worker.poll()
+            if self.app.db_worker.busy != self.busy:
+                self.busy = self.app.db_worker.busy
+                self.configure(cursor="watch" if self.busy else "")
+        except Exception:
+            self.loggers.log.exception("Polling the database requests failed.")
+        finally:
+            self.after(self.app.db_worker.POLL_INTERVAL, self.poll_db_worker)
+
+    def listen_rfid(self) -> None:
+        """
+        Binds the keyboard to the RFID reader,
+        unless the reader's device is read directly.
+        """
+        if self.app.rfid.reader is None:
+            self.bind("<Key>", self.app.rfid.rfid_callback)
+
+    def poll_rfid(self) -> None:
+        """
+        Hands the scans read from the RFID reader's device to the application.
+        """
+        try:
+            self.app.rfid.poll()
+        except Exception:
+            self.loggers.log.exception("Polling the RFID reader failed.")
+        finally:
+            self.after(self.RFID_POLL, self.poll_rfid)
+
+    def poll_catalog(self) -> None:
+        """
+        Applies the catalog changes retrieved in the background
+        to the menus displaying the categories changed.
+        """
+        try:
+            changes = self.app.catalog_refresher.poll()
+            if changes is not None:
+                changed_types, categories_changed = changes
+                if self.shopping_menu is not None and \
+                        self.app.config.name == self.app.config.CUSTOM:
+                    self.shopping_menu.right_grid.body.mark_stale(changed_types)
+                self.settings_menu.update_catalog(changed_types, categories_changed)
+        except Exception:
+            self.loggers.log.exception("Applying the catalog changes failed.")
+        finally:
+            self.after(self.CATALOG_POLL, self.poll_catalog)
+
     def setup_window(self) -> bool:
         """
         Setup the window of the application.
@@ -108,86 +226,80 @@ class GUI(Tk):
         self.loggers.log.debug("GUI closed.")
         return True
 
-    def load_images(self) -> None:
+    def register_images(self) -> None:
         """
-        Load every image of the application.
+        Registers every image of the application.
+        They are loaded when first used, as attributes of the GUI.
         """
         # general
-        self.back = self.open_image("back.png", 70, 70)
-        self.refresh = self.open_image("refresh.png", 70, 70)
+        self.images.register("back", "back.png", 70, 70)
+        self.images.register("refresh", "refresh.png", 70, 70)
 
         # main_menu
-        self.logo = self.open_image("MarcoNeo.png")
-        self.poweroff = self.open_image("power.png", 70, 70)
-        self.configuration = self.open_image("config.png", 70, 70)
-        self.lightbulb = self.open_image("lightbulb.png", 30, 30)
-        self.load = self.open_image("load.png", 130, 130)
-        self.tek = self.open_image("tek.png", 1000, 480)
-        self.configtek = self.open_image("config.png", 300, 300)
+        self.images.register("logo", "MarcoNeo.png")
+        self.images.register("poweroff", "power.png", 70, 70)
+        self.images.register("configuration", "config.png", 70, 70)
+        self.images.register("lightbulb", "lightbulb.png", 30, 30)
+        self.images.register("load", "load.png", 130, 130)
+        self.images.register("tek", "tek.png", 1000, 480)
+        self.images.register("configtek", "config.png", 300, 300)
 
         # credits_menu
-        self.credits = self.open_image("credits.png", 70, 70)
-        self.credits_txt = self.open_image("credits_txt.png", 450, 300)
+        self.images.register("credits", "credits.png", 70, 70)
+        self.images.register("credits_txt", "credits_txt.png", 450, 300)
 
         # history_menu
-        self.history = self.open_image("history.png", 70, 70)
-        self.history_lbl = self.open_image("history_lbl.png", 400, 60)
+        self.images.register("history", "history.png", 70, 70)
+        self.images.register("history_lbl", "history_lbl.png", 400, 60)
 
         # shopping_menu
-        self.discard = self.open_image("discard.png", 70, 70)
-        self.cart = self.open_image("cart.png", 50, 50)
-        self.confirm = self.open_image("confirm.png", 70, 70)
-        self.crown = self.open_image("crown.png", 70, 70)
-        self.pricemodifier = self.open_image("pricemodifier.png", 50, 50)
-        self.cancel = self.open_image("cancel.png", 70, 70)
-        self.resetprice = self.open_image("resetprice.png", 70, 70)
-        self.logout = self.open_image("logout.png", 50, 50)
-        self.id = self.open_image("ID.png", 70, 70)
-        self.warning = self.open_image("warning.png", 50, 50)
-        self.refill_lbl = self.open_image("refill_lbl.png", 550, 160)
-        self.recharger_lbl = self.open_image("recharger_lbl.png", 550, 110)
+        self.images.register("discard", "discard.png", 70, 70)
+        self.images.register("cart", "cart.png", 50, 50)
+        self.images.register("confirm", "confirm.png", 70, 70)
+        self.images.register("crown", "crown.png", 70, 70)
+        self.images.register("pricemodifier", "pricemodifier.png", 50, 50)
+        self.images.register("cancel", "cancel.png", 70, 70)
+        self.images.register("resetprice", "resetprice.png", 70, 70)
+        self.images.register("logout", "logout.png", 50, 50)
+        self.images.register("id", "ID.png", 70, 70)
+        self.images.register("warning", "warning.png", 50, 50)
+        self.images.register("refill_lbl", "refill_lbl.png", 550, 160)
+        self.images.register("recharger_lbl", "recharger_lbl.png", 550, 110)
 
         # labels
-        self.confirm_lbl = self.open_image("confirm_lbl.png", 450, 50)
-        self.credits_lbl = self.open_image("credits_lbl.png", 260, 60)
-        self.noncotisant_lbl = self.open_image("noncotisant.png", 150, 20)
-        self.customisemarco = self.open_image("customisemarco.png", 70, 70)
-        self.custommarco = self.open_image("custommarco.png", 135, 70)
-        self.defaultmarco = self.open_image("defaultmarco.png", 200, 70)
-        self.debiter = self.open_image("debiter.png", 500, 100)
+        self.images.register("confirm_lbl", "confirm_lbl.png", 450, 50)
+        self.images.register("credits_lbl", "credits_lbl.png", 260, 60)
+        self.images.register("noncotisant_lbl", "noncotisant.png", 150, 20)
+        self.images.register("customisemarco", "customisemarco.png", 70, 70)
+        self.images.register("custommarco", "custommarco.png", 135, 70)
+        self.images.register("defaultmarco", "defaultmarco.png", 200, 70)
+        self.images.register("debiter", "debiter.png", 500, 100)
 
         # price modifier
-        self.btn1 = self.open_image("1.png", 78, 78)
-        self.btn2 = self.open_image("2.png", 78, 78)
-        self.btn3 = self.open_image("3.png", 78, 78)
-        self.btn4 = self.open_image("4.png", 78, 78)
-        self.btn5 = self.open_image("5.png", 78, 78)
-        self.btn6 = self.open_image("6.png", 78, 78)
-        self.btn7 = self.open_image("7.png", 78, 78)
-        self.btn8 = self.open_image("8.png", 78, 78)
-        self.btn9 = self.open_image("9.png", 78, 78)
-        self.btn0 = self.open_image("0.png", 78, 78)
-        self.dot = self.open_image("dot.png", 78, 78)
-        self.backspace = self.open_image("backspace.png", 78, 78)
-        self.priceconfirm = self.open_image("priceconfirm.png", 3*78+30, 78)
+        self.images.register("btn1", "1.png", 78, 78)
+        self.images.register("btn2", "2.png", 78, 78)
+        self.images.register("btn3", "3.png", 78, 78)
+        self.images.register("btn4", "4.png", 78, 78)
+        self.images.register("btn5", "5.png", 78, 78)
+        self.images.register("btn6", "6.png", 78, 78)
+        self.images.register("btn7", "7.png", 78, 78)
+        self.images.register("btn8", "8.png", 78, 78)
+        self.images.register("btn9", "9.png", 78, 78)
+        self.images.register("btn0", "0.png", 78, 78)
+        self.images.register("dot", "dot.png", 78, 78)
+        self.images.register("backspace", "backspace.png", 78, 78)
+        self.images.register("priceconfirm", "priceconfirm.png", 3*78+30, 78)
 
         # customize menu
-        self.customize_lbl = self.open_image("customisez.png", 200, 50)
-        self.select_lbl = self.open_image("selectionnez.png", 260, 50)
-
+        self.images.register("customize_lbl", "customisez.png", 200, 50)
+        self.images.register("select_lbl", "selectionnez.png", 260, 50)
 
-    def open_image(self, file_name: str,
-                   width:int=None, height:int=None, color=None) -> ImageTk.PhotoImage:
+    def __getattr__(self, name:str):
         """
-        This function loads an image from the given path.
+        Returns the registered image of the given name,
+        loading it on first access.
         """
-        image_path = os.path.join(os.getcwd(), "data", "images", file_name)
-        image = Image.open(image_path)
-        if width and height:
-            image = image.resize((width, height), Image.ANTIALIAS)
-        if color:
-            image = image.convert('L')
-            image = ImageOps.colorize(image, "#000000",
-                                      color,).filter(ImageFilter.GaussianBlur(1))
-        photo = ImageTk.PhotoImage(image)
-        return photo
+        images = self.__dict__.get("images")
+        if images is not None and name in images:
+            return images.get(name)
+        return super().__getattr__(name)
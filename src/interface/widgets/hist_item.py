@@ -14,24 +14,53 @@ from src.utils.gui_utils import AppLabel, AppFrame
 class HistoryItem(AppFrame):
     """
     Item in which is displayed an order from the history.
+
+    Items are recycled: their labels are built once and
+    `bind_order` displays another order in them.
     """
-    def __init__(self, manager, item_purchased) -> None:
+    BG = "#0b1a35"
+    def __init__(self, manager, item_purchased=None) -> None:
         super().__init__(manager)
-        self.member_name = item_purchased[0]
-        self.item_name = item_purchased[1]
-        self.price = item_purchased[2]
-        self.amount = item_purchased[3]
-        self.date = item_purchased[4].strftime("%d/%m/%Y %H:%M")
-        self.config(bg="#0b1a35")
+        self.member_name = None
+        self.item_name = None
+        self.price = None
+        self.amount = None
+        self.date = None
+        self.config(bg=self.BG)
         self.setup_label()
+        if item_purchased is not None:
+            self.bind_order(item_purchased)
 
     def setup_label(self) -> None:
         """
         Defines the labels used in the history item.
         """
-        AppLabel(self, text=f"{self.member_name}",
-                 font=('system', 12, "bold"), bg="#0b1a35").pack(expand=True, fill='x',
-                     side="left", padx=10)
+        self.name_lbl = AppLabel(self, text="",
+                                 font=('system', 12, "bold"), bg=self.BG)
+        self.name_lbl.pack(expand=True, fill='x', side="left", padx=10)
+
+        self.price_lbl = AppLabel(self, text="",
+                                  font=('system', 12, "bold"), bg=self.BG)
+        self.price_lbl.pack(expand=True, fill='x', side="left", padx=10)
+
+        self.date_lbl = AppLabel(self, text="",
+                 font=('system', 12), bg=self.BG)
+        self.date_lbl.pack(side="right", padx=10, expand=True, fill='x')
+        self.date_lbl.configure(anchor="center")
+
+        self.order_lbl = AppLabel(self, text="",
+                                  font=('system', 12), bg=self.BG)
+        self.order_lbl.pack(side="left", padx=10)
+
+    def bind_order(self, item_purchased) -> None:
+        """
+        Displays the given order in the item.
+        """
+        self.member_name = item_purchased[0]
+        self.item_name = item_purchased[1]
+        self.price = item_purchased[2]
+        self.amount = item_purchased[3]
+        self.date = item_purchased[4].strftime("%d/%m/%Y %H:%M")
 
         color = "white"
         if self.price<0:
@@ -39,17 +68,17 @@ class HistoryItem(AppFrame):
         else:
             color = "red"
 
-        AppLabel(self, text=f"{-self.price}€",
-                 font=('system', 12, "bold"), bg="#0b1a35", fg=color).pack(expand=True, fill='x',
-                     side="left", padx=10)
-
-        date_lbl = AppLabel(self, text=f"{self.get_day_description(self.date)}",
-                 font=('system', 12), bg="#0b1a35")
-        date_lbl.pack(side="right", padx=10, expand=True, fill='x')
-        date_lbl.configure(anchor="center")
+        self.name_lbl.configure(text=f"{self.member_name}")
+        self.price_lbl.configure(text=f"{-self.price}€", fg=color)
+        self.date_lbl.configure(text=f"{self.get_day_description(self.date)}")
+        self.order_lbl.configure(text=f"{self.amount} x {self.item_name}")
 
-        AppLabel(self, text=f"{self.amount} x {self.item_name}",
-                 font=('system', 12), bg="#0b1a35").pack(side="left", padx=10)
+    def clear_order(self) -> None:
+        """
+        Empties the item.
+        """
+        for label in (self.name_lbl, self.price_lbl, self.date_lbl, self.order_lbl):
+            label.configure(text="")
 
     def get_day_description(self, date:datetime.datetime):
         """
@@ -71,4 +71,4 @@ class MemberCard(Frame):
             self.noncotisant.place_forget()
 
         self.name_label.configure(text=member.first_name + " " + member.last_name)
-        self.balance_label.configure(text=f"{member.balance}€")
+        self.balance_label.configure(text=member.balance.format())
@@ -7,6 +7,7 @@ Item of the settings page of the app.
 #-------------------------------------------------------------------#
 
 from src.utils.gui_utils import Frame, Label
+from src.server.catalog import Product
 
 #-------------------------------------------------------------------#
 
@@ -14,12 +15,12 @@ class SettItem(Frame):
     """
     Describes an item that can be selected or not in the settings.
     """
-    def __init__(self, manager:Frame=None, title:str=None,
-                 selected:bool=False) -> None:
+    def __init__(self, manager:Frame=None, product:Product=None) -> None:
         super().__init__(manager)
         self.manager = manager
-        self.title = title
-        self.selected = selected
+        self.product = product
+        self.title = product.title
+        self.selected = product.selected
         self.configure(bg="#ff0000", width=120, height=120,
                        highlightbackground="#660000", highlightthickness=6)
         self.propagate(False)
@@ -56,18 +57,12 @@ class SettItem(Frame):
         """
         custom_config = self.manager.settings_manager.gui.app.config.api_config.config_json
         if self.selected:
-            for prod_type in custom_config:
-                for prod in prod_type["products"]:
-                    if prod["title"] == self.title:
-                        prod["selected"] = False
+            custom_config.set_selected(self.product, False)
             self.selected = False
             self.configure(bg="#ff0000", highlightbackground="#660000")
             self.name_lbl.configure(fg="#660000", bg="#ff0000")
         else:
-            for prod_type in custom_config:
-                for prod in prod_type["products"]:
-                    if prod["title"] == self.title:
-                        prod["selected"] = True
+            custom_config.set_selected(self.product, True)
             self.configure(bg="#00cc00", highlightbackground="#004400")
             self.name_lbl.configure(fg="#004400", bg="#00cc00")
             self.selected = True
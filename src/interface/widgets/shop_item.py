@@ -6,8 +6,8 @@ Configures the items that can be bought in the shop.
 
 #-------------------------------------------------------------------#
 
-import decimal
 from src.utils.gui_utils import AppLabel, Frame
+from src.utils.money import Money
 
 #-------------------------------------------------------------------#
 
@@ -20,9 +20,10 @@ class ShopItem(Frame):
         Item's constructor.
         """
         super().__init__(manager)
-        self.configure(bg=color, width=120, height=120,
-                       highlightbackground=self.darken(color), highlightthickness=6)
         self.color = color
+        self.dark_color = self.darken(color)
+        self.configure(bg=color, width=120, height=120,
+                       highlightbackground=self.dark_color, highlightthickness=6)
         manager = manager.master
         self.manager = manager
         self.gui_manager = self.manager.manager.manager.gui
@@ -31,7 +32,7 @@ class ShopItem(Frame):
 
         self.title = title
         self.id_product = id_product
-        self.price = decimal.Decimal(price)
+        self.price = Money.parse(price)
         self.amount = 0
 
         self.name_label = None
@@ -46,12 +47,12 @@ class ShopItem(Frame):
         """
         # The name and the amount are labels inside the Frame.
         self.name_label = AppLabel(self, text=self.title.capitalize(), font=("system", 12, "bold"),
-                                   fg=self.darken(self.color), bg=self.color)
+                                   fg=self.dark_color, bg=self.color)
         self.amount_label = AppLabel(self, text=self.amount, font=("system", 10),
-                                     fg=self.darken(self.color), bg=self.color)
-        self.price_label = AppLabel(self, text=str(self.price)+"€",
+                                     fg=self.dark_color, bg=self.color)
+        self.price_label = AppLabel(self, text=self.price.format(),
                                     font=("system", 12, "bold"),
-                                    fg=self.darken(self.color), bg=self.color)
+                                    fg=self.dark_color, bg=self.color)
 
         self.name_label.place(relx=0.5, rely=0.2, anchor="center")
         self.amount_label.place(relx=0.5, rely=0.5, anchor="center")
@@ -73,8 +74,7 @@ class ShopItem(Frame):
 
         # Cart's modification
         self.amount += 1
-        self.cart.add_to_cart({self.id_product: (self.amount, self.price)})
-        self.cart.total += self.price
+        self.cart.add(self.id_product, self.price)
 
         # Body's modification
         self.amount_label.configure(text=self.amount)
@@ -82,6 +82,14 @@ class ShopItem(Frame):
         # Footer's modification
         self.footer.update_footer()
 
+    def reset(self) -> None:
+        """
+        Resets the amount of the item.
+        """
+        if self.amount:
+            self.amount = 0
+            self.amount_label.configure(text=self.amount)
+
     def darken(self, color: str) -> str:
         """
         Darkens the color.
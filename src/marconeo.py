@@ -8,13 +8,23 @@ as well as the connections to the database and the RFID reader.
 
 #-------------------------------------------------------------------#
 
+from concurrent.futures import ThreadPoolExecutor
+
 from src.utils.loggers import Loggers
+from src.utils.startup_timeline import StartupTimeline
 from src.client.member import Member
 from src.client.cart import Cart
 from src.server.config import Config
 from src.server.db_cursor import DBCursor
+from src.server.db_worker import DBWorker
+from src.server.journal import Journal
+from src.server.session_store import SessionStore
+from src.server.catalog_refresher import CatalogRefresher
+from src.server.db_pool import CONNECTION_ERRORS
+from src.server.migrations import check_query_plans, check_schema
 from src.server.payment_service import PaymentService
 from src.client.rfid import RFID
+from src.utils.money import Money
 from src.interface.user_interface import GUI
 
 #-------------------------------------------------------------------#
@@ -28,6 +38,7 @@ class MarcoNeo:
 
     NAME = "MARCONEO"
     VERSION = "0.6"
+    PRELOAD_ROSTER = False # Load every member in memory at startup
 
     def __init__(self) -> None:
         """
@@ -37,28 +48,89 @@ class MarcoNeo:
         self.loggers = Loggers(MarcoNeo.NAME)
         self.loggers.log.info("Starting MarcoNeo v%s...", MarcoNeo.VERSION)
 
-        # Setup the client user
-        self.current_user = Member(self)
-        self.cart = Cart(self.loggers, self.current_user)
+        self.timeline = StartupTimeline(self.loggers)
 
-        # Setup the database cursor and payment service
-        self.config = Config(self)
-        self.db_cursor = DBCursor(self)
+        # Setup the client user, whose session is kept on disk
+        self.session = SessionStore(self)
+        self.recovered_session = None
+        self.current_user = Member(self)
+        self.cart = Cart(self.loggers, self.current_user, on_change=self.save_session)
+
+        # The config (BDE API) and the database are set up at the same time,
+        # while the window shows up. finish_startup is called once both are done.
+        self.config = None
+        self.db_cursor = None
+        self.db_worker = None
+        self.catalog_refresher = None
+        self.startup = ThreadPoolExecutor(max_workers=2, thread_name_prefix="Startup")
+        self.config_future = self.startup.submit(self.timeline.run, "config", Config, self)
+        self.db_future = self.startup.submit(self.timeline.run, "database", self.setup_database)
+
+        with self.timeline.phase("journal"):
+            self.journal = Journal(self)
         self.payment_service = PaymentService(self)
+        self.payment_in_progress = False # The member can't change meanwhile
 
         # Setup the RFID reader and the GUI
         self.rfid = RFID(self)
-        self.loggers.log.info("MarcoNeo launched.")
 
         self.gui = None
         GUI(self)
 
+    def setup_database(self) -> DBCursor:
+        """
+        Connects to the database (and loads the roster).
+        Raises SchemaOutdated if some migration isn't applied.
+        """
+        db_cursor = DBCursor(self)
+        try:
+            check_schema(db_cursor.pool, self.loggers)
+        except CONNECTION_ERRORS as err:
+            # Checked by the journal replay once the database is back.
+            self.loggers.log.warning("Database schema not checked: %s", err)
+        if MarcoNeo.PRELOAD_ROSTER:
+            db_cursor.preload_roster()
+        return db_cursor
+
+    def startup_done(self) -> bool:
+        """
+        Returns True once the config and the database are set up.
+        """
+        return self.config_future.done() and self.db_future.done()
+
+    def finish_startup(self) -> None:
+        """
+        Starts the services depending on the config and the database.
+        Raises the error of the setup that failed, if any.
+        """
+        self.config = self.config_future.result()
+        self.db_cursor = self.db_future.result()
+        self.startup.shutdown(wait=False)
+
+        self.db_worker = DBWorker(self, max_workers=self.db_cursor.pool.size)
+        self.db_worker.submit(check_query_plans, self.db_cursor)
+        self.journal.start_replay(self.db_cursor)
+        self.session.start()
+        self.db_worker.submit(self.session.recover, self.journal, self.db_cursor,
+                              callback=self.session_recovered)
+        self.catalog_refresher = CatalogRefresher(self)
+        self.catalog_refresher.start()
+        self.loggers.log.info("MarcoNeo launched.")
+
     def close(self):
         """
         Quits the application.
         """
+        if self.catalog_refresher is not None:
+            self.catalog_refresher.stop()
         # Close the database connection safely
-        self.db_cursor.close()
+        if self.db_worker is not None:
+            self.db_worker.close()
+        self.rfid.stop()
+        self.session.close()
+        self.journal.close()
+        if self.db_cursor is not None:
+            self.db_cursor.close()
         # Close the rest of the application
         self.gui.close()
         self.loggers.log.info("Closing MARCONEO...")
@@ -72,6 +144,11 @@ class MarcoNeo:
         if self.gui.shopping_menu is None:
             return
 
+        # Scans are ignored while the cart of the member is being paid
+        if self.payment_in_progress:
+            self.loggers.log.warning("Scan ignored: a payment is in progress.")
+            return
+
         # Refill security
         if self.gui.shopping_menu.left_grid.navbar.current_toggle == "Rechargement":
             if not self.gui.shopping_menu.refill_bool:
@@ -83,10 +160,49 @@ class MarcoNeo:
 
         # Update application's current data
         self.current_user.__init__(self, user_data)
-        self.cart.__init__(self.loggers, self.current_user)
+        self.cart.member = self.current_user
+        self.cart.reset()
 
         # Update the GUI
         self.gui.shopping_menu.right_grid.header.member_card.update_card(self.current_user)
         self.gui.shopping_menu.right_grid.body.update_body(
             self.gui.shopping_menu.left_grid.navbar.current_toggle)
         self.gui.shopping_menu.right_grid.footer.update_footer()
+
+    def save_session(self) -> None:
+        """
+        Records the current member and cart in the session snapshot.
+        """
+        self.session.update(self.current_user, self.cart)
+
+    def session_recovered(self, session:dict=None) -> None:
+        """
+        Keeps the session left by the previous run until the shopping
+        menu is displayed (resumed right away if it already is).
+        """
+        self.recovered_session = session
+        if session is not None and self.gui.shopping_menu is not None \
+                and self.gui.current_menu is self.gui.shopping_menu:
+            self.resume_session()
+
+    def resume_session(self) -> None:
+        """
+        Logs the member of the session left by the previous run back in
+        and gives them their cart back.
+        """
+        session, self.recovered_session = self.recovered_session, None
+        if session is None:
+            return
+
+        def restore(member_data:dict=None) -> None:
+            if member_data is None:
+                self.loggers.log.warning("Member of the interrupted session not found.")
+                return
+            self.update_user(member_data)
+            for product_id, price, quantity in session["lines"]:
+                self.cart.add(product_id, Money.parse(price), quantity)
+            self.gui.shopping_menu.right_grid.footer.update_footer()
+            self.loggers.log.info("Interrupted session of %s resumed.", self.current_user)
+
+        self.db_worker.submit(self.db_cursor.get_member, session["card_id"],
+                              callback=restore)
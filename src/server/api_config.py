@@ -7,22 +7,43 @@ containing every json retrieved from the BDE API.
 
 #-------------------------------------------------------------------#
 
-import sys
+import os
+import copy
+import json
 import decimal
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.server.catalog import Catalog
+from src.utils.money import Money
 
 #-------------------------------------------------------------------#
 
 class APIJsons:
     """
     A dictionary containing every json retrieved from the BDE API.
+
+    Every response is kept on disk with its validators (ETag,
+    Last-Modified), which are sent back on the next request:
+    an unchanged catalog isn't downloaded again. When the server
+    is slow or down, the last response kept is used instead.
     """
+    URL = "https://bde-pprd.its-tps.fr/api"
+    TIMEOUT = 10 # Seconds
+
     def __init__(self, config_manager=None) -> None:
         super().__init__()
         self.config_manager = config_manager
         self.loggers = config_manager.app.loggers
         self.loggers.log.info("Retrieving API config...")
-        self.config_json, self.categories_json = {}, {}
+        self.config_json, self.categories_json = Catalog(), {}
+        self.snapshot_dir = os.path.join(os.getcwd(), "data", "json", "api")
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+        # Both endpoints share the connections of one session.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
 
         self.setup_jsons()
 
@@ -30,27 +51,94 @@ class APIJsons:
 
         self.loggers.log.info("API configurations files retrieved.")
 
-    def get_api(self, url) -> dict:
+    def fetch(self, endpoint:str) -> dict:
+        """
+        Asks the BDE API for the endpoint, with the validators of the last
+        response kept. Returns the new response, or None if it is unchanged.
+        Raises requests' errors if the server can't answer, and ValueError
+        if its answer isn't JSON: only the answers parsed are kept.
+        """
+        headers = {}
+        validators = self.load_validators(endpoint)
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        api_config_resp = self.session.get(f"{self.URL}/{endpoint}", headers=headers,
+                                           timeout=self.TIMEOUT)
+        if api_config_resp.status_code == 304:
+            return None
+        api_config_resp.raise_for_status()
+        response = json.loads(api_config_resp.text, parse_float=decimal.Decimal)
+        self.save_snapshot(endpoint, api_config_resp)
+        return response
+
+    def get_api(self, endpoint:str) -> dict:
         """
         Retrieves the API config from the BDE API.
+        Falls back to the last response kept if it is unchanged
+        or if the server can't answer (or doesn't answer JSON).
         """
         try:
-            api_config_resp = requests.get(url,
-                                      timeout=20)
-            api_config_resp.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            self.loggers.log.error(err)
-            print("Error with distant server, please try again later.")
-            sys.exit(1)
-        except requests.exceptions.ConnectionError as err:
-            self.loggers.log.error(err)
-            print("Can't reach distant server, please check your internet connection.")
-            sys.exit(1)
-        except requests.exceptions.Timeout as err:
+            response = self.fetch(endpoint)
+        except (requests.exceptions.RequestException, ValueError) as err:
             self.loggers.log.error(err)
-            print("Timeout error, please check your internet connection.")
-            sys.exit(1)
-        return api_config_resp.json(parse_float=decimal.Decimal)
+            print("Can't reach distant server, the last catalog retrieved is used.")
+            return self.load_snapshot(endpoint)
+        if response is None:
+            self.loggers.log.info("%s is unchanged since the last retrieval.", endpoint)
+            return self.load_snapshot(endpoint)
+        return response
+
+    def snapshot_path(self, endpoint:str, suffix:str="json") -> str:
+        """
+        Returns the path of the file keeping the last response of the endpoint.
+        """
+        return os.path.join(self.snapshot_dir, f"{endpoint}.{suffix}")
+
+    def load_validators(self, endpoint:str) -> dict:
+        """
+        Returns the validators of the last response kept.
+        """
+        if not os.path.exists(self.snapshot_path(endpoint)):
+            return {}
+        try:
+            with open(self.snapshot_path(endpoint, "headers.json"), 'r',
+                      encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def load_snapshot(self, endpoint:str) -> dict:
+        """
+        Returns the last response kept, or an empty one
+        if the endpoint has never been retrieved.
+        """
+        try:
+            with open(self.snapshot_path(endpoint), 'r', encoding="utf-8") as file:
+                return json.loads(file.read(), parse_float=decimal.Decimal)
+        except (OSError, json.JSONDecodeError) as err:
+            self.loggers.log.error("No usable snapshot of %s: %s", endpoint, err)
+            return {"data": []}
+
+    def save_snapshot(self, endpoint:str, response:requests.Response) -> None:
+        """
+        Keeps the response and its validators on disk.
+        """
+        validators = {}
+        if "ETag" in response.headers:
+            validators["etag"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            validators["last_modified"] = response.headers["Last-Modified"]
+
+        for path, content in ((self.snapshot_path(endpoint), response.text),
+                              (self.snapshot_path(endpoint, "headers.json"),
+                               json.dumps(validators))):
+            temporary = path + ".tmp"
+            with open(temporary, 'w', encoding="utf-8") as file:
+                file.write(content)
+            os.replace(temporary, path)
 
     def retrieve_categories(self, config) -> list:
         """
@@ -58,16 +146,98 @@ class APIJsons:
         """
         return [product_type["type"] for product_type in config]
 
+    def remember_prices(self, config:dict) -> None:
+        """
+        Keeps the prices given by the API, to tell them
+        from the prices changed on the Marco.
+        """
+        self.remote_prices = {Catalog.key(product_type["product_type"], product["id"],
+                                          product["title"]): Money.parse(product["price"])
+                              for product_type in config['data']
+                              for product in product_type["products"]}
+
     def setup_jsons(self) -> None:
         """
         Setup the jsons.
+        Both endpoints are retrieved at the same time.
         """
-        config = self.get_api("https://bde-pprd.its-tps.fr/api/product")
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="API") as executor:
+            products = executor.submit(self.get_api, "product")
+            product_types = executor.submit(self.get_api, "productType")
+            config = products.result()
+            categories = product_types.result()
+
         self.config_manager.cat_selected_params(config)
         self.config_manager.cat_refill(config)
         self.config_manager.generate_json("config", config)
-        self.config_json = config['data']
+        self.remember_prices(config)
+        self.config_json = Catalog(config['data'])
+
+        self.config_manager.generate_json("categories", categories)
+        self.categories_json = categories['data']
+
+    def refresh(self) -> tuple:
+        """
+        Asks the BDE API for a new catalog, without blocking on the GUI.
+        Returns the new (products, product types) responses,
+        None for the ones unchanged or that can't be retrieved.
+        An endpoint that fails doesn't drop the response of the other,
+        whose snapshot is already kept: it is retried on the next refresh.
+        """
+        responses = []
+        for endpoint in ("product", "productType"):
+            try:
+                responses.append(self.fetch(endpoint))
+            except (requests.exceptions.RequestException, ValueError) as err:
+                self.loggers.log.debug("Refresh of %s postponed: %s", endpoint, err)
+                responses.append(None)
+        return tuple(responses)
+
+    def apply_catalog(self, config:dict=None, categories:dict=None) -> tuple:
+        """
+        Merges a new catalog into the current one, keeping the products
+        selected and the prices changed on the Marco.
+        Returns the product types whose products changed and
+        whether the categories changed.
+        """
+        changed_types = set()
+        if config is not None:
+            self.config_manager.cat_selected_params(config)
+            self.config_manager.cat_refill(config)
+            old_prices = self.remote_prices
+
+            # The selection is kept in the json written, not the prices changed.
+            for product_type in config['data']:
+                for product in product_type["products"]:
+                    old_product = self.config_json.lookup(
+                        Catalog.key(product_type["product_type"], product["id"],
+                                    product["title"]))
+                    if old_product is not None:
+                        product["selected"] = old_product.selected
+            self.config_manager.generate_json("config", config)
+            self.remember_prices(config)
+
+            merged = copy.deepcopy(config['data'])
+            for product_type in merged:
+                for product in product_type["products"]:
+                    key = Catalog.key(product_type["product_type"], product["id"],
+                                      product["title"])
+                    old_product = self.config_json.lookup(key)
+                    if old_product is not None and old_product.price != old_prices.get(key):
+                        product["price"] = str(old_product.price)
+
+            # In place: the loaded config may be this very catalog.
+            changed_types = self.config_json.update(merged)
+
+        categories_changed = False
+        if categories is not None:
+            new_categories = self.retrieve_categories(categories['data'])
+            categories_changed = new_categories != self.categories
+            self.config_manager.generate_json("categories", categories)
+            self.categories_json = categories['data']
+            self.categories = new_categories
 
-        config = self.get_api("https://bde-pprd.its-tps.fr/api/productType")
-        self.config_manager.generate_json("categories", config)
-        self.categories_json = config['data']
+        if changed_types or categories_changed:
+            self.loggers.log.info("Catalog updated (%s).",
+                                  ", ".join(sorted(changed_types)) or "categories")
+        return changed_types, categories_changed
@@ -0,0 +1,197 @@
+"""
+catalog.py
+
+Defines the Catalog class and its Product records,
+the products of a config loaded once from the json and indexed.
+"""
+
+#-------------------------------------------------------------------#
+
+from src.utils.money import Money
+
+#-------------------------------------------------------------------#
+
+class Product:
+    """
+    Product of the catalog.
+    """
+    __slots__ = ("product_type", "id", "name", "title", "price", "color", "selected")
+
+    def __init__(self, product_type:str, data:dict) -> None:
+        self.product_type = product_type
+        self.id = data.get("id")
+        self.name = data.get("name")
+        self.title = data.get("title")
+        self.price = Money.parse(data["price"])
+        self.color = data.get("color")
+        self.selected = data.get("selected", False)
+
+    @property
+    def key(self):
+        """
+        Identifies the product across two catalogs.
+        """
+        return Catalog.key(self.product_type, self.id, self.title)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the product as it is written in the json.
+        """
+        return {"id": self.id, "name": self.name, "title": self.title,
+                "price": str(self.price), "color": self.color, "selected": self.selected}
+
+    def __repr__(self) -> str:
+        return f"Product({self.product_type!r}, {self.title!r}, {self.price})"
+
+#-------------------------------------------------------------------#
+
+class Catalog:
+    """
+    Products of a config, indexed by id, by (product type, title)
+    and by product type, with the number of products selected
+    in each product type.
+    """
+    def __init__(self, data:list=()) -> None:
+        """
+        Catalog's constructor.
+        `data` is the list of product types of the json.
+        """
+        self.types = {} # product type -> its fields, without the products
+        self.by_type = {} # product type -> [Product]
+        self.by_id = {}
+        self.by_title = {} # (product type, title) -> Product
+        self.selected_count = {} # product type -> number of products selected
+        for product_type in data:
+            self._add(product_type)
+
+    @staticmethod
+    def key(product_type:str, product_id:int, title:str):
+        """
+        Returns what identifies a product across two catalogs:
+        its id, or its title in its product type if it has no id.
+        """
+        return product_id if product_id is not None else (product_type, title)
+
+    @staticmethod
+    def normalize(product_type:dict) -> dict:
+        """
+        Returns a product type of the json with only the fields
+        of the products kept by the catalog.
+        """
+        name = product_type["product_type"]
+        return {**{field: value for field, value in product_type.items()
+                   if field != "products"},
+                "products": [Product(name, product).to_dict()
+                             for product in product_type["products"]]}
+
+    def _add(self, product_type:dict) -> None:
+        """
+        Indexes a product type of the json and its products.
+        """
+        name = product_type["product_type"]
+        self.types[name] = {field: value for field, value in product_type.items()
+                            if field != "products"}
+        products = [Product(name, product) for product in product_type["products"]]
+        self.by_type[name] = products
+        for product in products:
+            if product.id is not None:
+                self.by_id[product.id] = product
+            self.by_title[(name, product.title)] = product
+        self.selected_count[name] = sum(product.selected for product in products)
+
+    def _remove(self, name:str) -> None:
+        """
+        Drops a product type and its products from the indexes.
+        """
+        for product in self.by_type.pop(name):
+            if product.id is not None and self.by_id.get(product.id) is product:
+                del self.by_id[product.id]
+            if self.by_title.get((name, product.title)) is product:
+                del self.by_title[(name, product.title)]
+        del self.types[name]
+        del self.selected_count[name]
+
+    def update(self, data:list) -> set:
+        """
+        Replaces the content of the catalog by the given json, in place.
+        Only the product types that changed get new Product records.
+        Returns the names of the product types changed.
+        """
+        changed = set()
+        names = [product_type["product_type"] for product_type in data]
+        for name in set(self.by_type) - set(names):
+            self._remove(name)
+            changed.add(name)
+        for product_type in data:
+            name = product_type["product_type"]
+            if name in self.by_type:
+                if self.type_json(name) == self.normalize(product_type):
+                    continue
+                self._remove(name)
+            self._add(product_type)
+            changed.add(name)
+        self.by_type = {name: self.by_type[name] for name in names}
+        return changed
+
+    def categories(self) -> list:
+        """
+        Returns the product types, in the order of the json.
+        """
+        return list(self.by_type)
+
+    def selected_categories(self) -> list:
+        """
+        Returns the product types with at least one product selected.
+        """
+        return [name for name in self.by_type if self.selected_count[name]]
+
+    def products(self, product_type:str) -> list:
+        """
+        Returns the products of the product type.
+        """
+        return self.by_type.get(product_type, [])
+
+    def get(self, product_id:int) -> Product:
+        """
+        Returns the product with the given id, or None.
+        """
+        return self.by_id.get(product_id)
+
+    def find(self, product_type:str, title:str) -> Product:
+        """
+        Returns the product of the product type with the given title, or None.
+        """
+        return self.by_title.get((product_type, title))
+
+    def lookup(self, key) -> Product:
+        """
+        Returns the product identified by the key (see `key`), or None.
+        """
+        if isinstance(key, tuple):
+            return self.by_title.get(key)
+        return self.by_id.get(key)
+
+    def set_selected(self, product:Product, selected:bool) -> None:
+        """
+        Selects or unselects a product.
+        """
+        if product.selected == selected:
+            return
+        product.selected = selected
+        self.selected_count[product.product_type] += 1 if selected else -1
+
+    def type_json(self, name:str) -> dict:
+        """
+        Returns a product type as it is written in the json.
+        """
+        return {**self.types[name],
+                "products": [product.to_dict() for product in self.by_type[name]]}
+
+    def to_json(self) -> list:
+        """
+        Returns the catalog as the list of product types of the json.
+        """
+        return [self.type_json(name) for name in self.by_type]
+
+    def __len__(self) -> int:
+        return len(self.by_type)
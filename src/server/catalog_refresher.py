@@ -0,0 +1,57 @@
+"""
+catalog_refresher.py
+
+Defines the CatalogRefresher class, which keeps
+the catalog up to date with the BDE API while the Marco runs.
+"""
+
+#-------------------------------------------------------------------#
+
+import queue
+
+from src.utils.background_loop import BackgroundLoop
+
+#-------------------------------------------------------------------#
+
+class CatalogRefresher(BackgroundLoop):
+    """
+    Polls the BDE API for catalog changes in a background thread.
+
+    Requests are conditional, so an unchanged catalog costs a 304.
+    New catalogs are queued; the GUI merges them on the Tk thread
+    (see `poll`) and only updates the categories that changed.
+    """
+    INTERVAL = 300 # Seconds
+
+    def __init__(self, app, interval:int=INTERVAL) -> None:
+        """
+        CatalogRefresher's constructor.
+        """
+        super().__init__("CatalogRefresher",
+                         join_timeout=app.config.api_config.TIMEOUT)
+        self.app = app
+        self.loggers = app.loggers
+        self.interval = interval
+        self.updates = queue.Queue()
+
+    def _run(self) -> None:
+        """
+        Body of the background refresh thread.
+        """
+        while not self._stop.wait(self.interval):
+            products, product_types = self.app.config.api_config.refresh()
+            if products is not None or product_types is not None:
+                self.updates.put((products, product_types))
+
+    def poll(self) -> tuple:
+        """
+        Merges the catalog retrieved since the last call, if any.
+        Must be called from the Tk thread.
+        Returns the product types changed and whether the categories
+        changed, or None if there is nothing new.
+        """
+        try:
+            products, product_types = self.updates.get_nowait()
+        except queue.Empty:
+            return None
+        return self.app.config.api_config.apply_catalog(products, product_types)
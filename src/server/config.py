@@ -14,6 +14,8 @@ import os
 import decimal
 
 from src.server.api_config import APIJsons
+from src.server.catalog import Catalog
+from src.utils.money import Money
 
 #-------------------------------------------------------------------#
 
@@ -26,7 +28,7 @@ class Config:
     def __init__(self, app) -> None:
         """
         Reads the json file (./config.json).
-        Shuts down the process if an error occurs.
+        Raises json.JSONDecodeError if it can't be parsed.
 
         The json file is used to configure the images and the shopping menus
         (items, prices, etc.)
@@ -35,7 +37,7 @@ class Config:
         self.app = app
 
         self.api_config = APIJsons(self)
-        self.loaded_config = {}
+        self.loaded_config = Catalog()
 
         # By default, the config is set to default.
         self.name = self.DEFAULT
@@ -52,13 +54,14 @@ class Config:
                   encoding="utf-8") as file:
             file.write(json.dumps(json_retrieved, indent=4))
 
-    def load(self, file_name:str=None) -> dict:
+    def load(self, file_name:str=None) -> Catalog:
         """
         Loads the json file onto loaded_config and copies it to initial_config.
-        Returns a dictionary containing the json file data.
+        Returns the catalog of the json file data.
+        Raises json.JSONDecodeError if the file can't be parsed.
         """
         if file_name is None:
-            return {}
+            return Catalog()
         dictionary = {}
 
         with open(os.path.join(os.getcwd(),"data","json", f"{file_name}.json"),
@@ -68,12 +71,13 @@ class Config:
         try:
             dictionary.update(json.loads(json_content, parse_float=decimal.Decimal))
         except json.JSONDecodeError as decode_err:
-            self.loggers.log.warning("Error while parsing the config.json file at line %s",
-                                     decode_err.lineno)
-            self.app.close()
-        return dictionary["data"]
+            # Raised to the caller: the startup thread can't close the GUI itself.
+            self.loggers.log.error("Error while parsing the %s.json file at line %s",
+                                   file_name, decode_err.lineno)
+            raise
+        return Catalog(dictionary["data"])
 
-    def update_custom_config(self, new_config:dict) -> None:
+    def update_custom_config(self, new_config:Catalog) -> None:
         """
         Updates the custom config.
         """
@@ -93,12 +97,9 @@ class Config:
         """
         Changes the price of an item.
         """
-        for product_type in self.loaded_config:
-            if product_type["product_type"] == toggle:
-                for item in product_type["products"]:
-                    if item['title'] == item_name:
-                        item['price'] = decimal.Decimal(new_price)
-                        break
+        product = self.loaded_config.find(toggle, item_name)
+        if product is not None:
+            product.price = Money.parse(new_price)
 
     def cat_refill(self, config) -> None:
         """
@@ -116,8 +117,7 @@ class Config:
         """
         Returns the categories of the loaded config.
         """
-        return [product_type["product_type"] for product_type in self.api_config.config_json
-                 if any(product["selected"] for product in product_type["products"])]
+        return self.api_config.config_json.selected_categories()
 
     def get_product_types(self) -> list:
         """
@@ -125,7 +125,7 @@ class Config:
         """
         match self.name:
             case self.DEFAULT:
-                return [product_type["product_type"] for product_type in self.default_config]
+                return self.default_config.categories()
             case self.CUSTOM:
                 return self.get_custom_categories()
 
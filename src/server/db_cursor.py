@@ -7,12 +7,36 @@ related to the connexion to the database.
 
 #-------------------------------------------------------------------#
 
-import decimal
-import mysql.connector as mysql
+import uuid
+from contextlib import closing
+from mysql.connector import errorcode
+from mysql.connector.errors import Error as MySQLError, IntegrityError
 
 from src.utils.decorators import close_service, setup_service, logging_request
 from src.client.member import Member
 from src.server.logins import Logins
+from src.server.db_pool import DBPool
+from src.server.member_cache import MemberCache
+from src.server.roster import Roster
+from src.utils.money import Money
+
+#-------------------------------------------------------------------#
+
+class BalanceError(Exception):
+    """
+    Raised when the balance of a member can't be debited.
+    """
+
+class InsufficientFunds(BalanceError):
+    """
+    Raised when the member doesn't have enough money for the debit.
+    """
+
+class BalanceConflict(BalanceError):
+    """
+    Raised when the member's row changed under our feet
+    (deleted or not matched by the update).
+    """
 
 #-------------------------------------------------------------------#
 
@@ -20,123 +44,322 @@ class DBCursor:
     """
     Defines the objects of type cursors that point on the MySQL database.
     It will be able to return information or modify values in the database.
+
+    Every request borrows a connection from the pool and hands it back,
+    so a dropped connection no longer blocks the whole application.
     """
-    def __init__(self, app) -> None:
+    MEMBER_QUERY = """SELECT id, first_name, last_name, card_number,\
+                            balance, admin, contributor
+                                FROM members
+                                WHERE card_number = %s"""
+
+    def __init__(self, app, pool_size:int=DBPool.DEFAULT_SIZE) -> None:
         """
         DataBase's constructor.
         """
         self.loggers = app.loggers
-        self.connection = None
-        self.cursor = None
         self._logins = Logins()
+        self.pool = DBPool(self.loggers, self._logins, size=pool_size)
+        self.member_cache = MemberCache(self.loggers)
+        self.roster = None
         self.connect_to_db()
-        self.cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
 
     @logging_request
-    @setup_service(max_attempts=5)
+    @setup_service(max_attempts=5, required=False)
     def connect_to_db(self) -> bool:
         """
         Connects to the database.
+        If it can't be reached, the application starts offline and
+        the pool connects on the first request that needs it.
         """
-        self.connection = mysql.connect(host=self._logins.get_host(),
-                                        database=self._logins.get_database(),
-                                        user=self._logins.get_user(),
-                                        password=self._logins.get_password(),
-                                        port=self._logins.get_port())
-        self.cursor = self.connection.cursor()
+        self.pool.open()
         self.loggers.log.info("Connected to the database.")
         return True
 
-    @close_service
+    @close_service()
     def close(self) -> bool:
         """
         Ferme la session MySQL.
         """
-        self.connection.close()
+        if self.roster is not None:
+            self.roster.stop()
+        self.pool.close()
+        self.loggers.log.debug("Member cache stats: %s", self.member_cache.stats())
         self.loggers.log.debug("Disconnected from the database.")
         return True
 
+    @logging_request
+    def preload_roster(self) -> bool:
+        """
+        Loads the whole members table in memory and keeps it in sync
+        in the background. Badge lookups are then served by the roster,
+        even during short database outages.
+        """
+        self.roster = Roster(self)
+        try:
+            self.roster.load()
+        except MySQLError as err:
+            # The sync thread loads the roster once the database is back.
+            self.loggers.log.warning("Roster can't be loaded yet: %s", err)
+        self.roster.start()
+        return True
+
+    def remember_balance(self, card_id:int, balance) -> None:
+        """
+        Writes a balance confirmed by the database through to the
+        member cache and the roster.
+        """
+        self.member_cache.update_balance(card_id, balance)
+        if self.roster is not None:
+            self.roster.update_balance(card_id, balance)
+
+    def forget_member(self, card_id:int) -> None:
+        """
+        Drops a member whose cached data can't be trusted anymore.
+        """
+        self.member_cache.invalidate(card_id)
+        if self.roster is not None:
+            self.roster.invalidate(card_id)
+
     @logging_request
     def get_member(self, card_id:int) -> Member:
         """
         Retrieves a user with the given ID from the database.
         Returns the user if a match is foundin the database, None otherwise
+
+        Members are served from the roster when it is preloaded,
+        and members recently scanned from the member cache.
         """
         if card_id < 0:
             return None
 
+        if self.roster is not None:
+            member_data = self.roster.get(card_id)
+            if member_data is not None:
+                return member_data
 
-        self.cursor.execute("""SELECT id, first_name, last_name, card_number,\
-                            balance, admin, contributor
-                                FROM members
-                                WHERE card_number = %s""", (card_id,))
+        member_data = self.member_cache.get(card_id)
+        if member_data is not None:
+            self.loggers.log.debug(f"Member {member_data['first_name']} (ID:{card_id}) cached")
+            return member_data
 
-        result = self.cursor.fetchone()
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            cursor.execute(self.MEMBER_QUERY, (card_id,))
+            result = cursor.fetchone()
 
         if result is not None:
             member_data = {'id':result[0],
                             'first_name':result[1],
                             'last_name':result[2],
                             'card_number':result[3],
-                            'balance':result[4],
+                            'balance':Money.parse(result[4]),
                             'admin':result[5],
                             'contributor':result[6]}
             self.loggers.log.debug(f"Retrieving member {member_data['first_name']} (ID:{card_id})")
+            self.member_cache.put(card_id, member_data)
             return member_data
         self.loggers.log.warn(f"No member found with card ID {card_id}")
 
+    def _apply_debit(self, cursor, member_id:int, debit:Money,
+                     guarded:bool=True) -> Money:
+        """
+        Debits the balance of a member on the server side, inside the
+        caller's transaction. A negative debit credits the balance.
+        Returns the new balance of the member.
+
+        The arithmetic is done by MySQL so that two terminals serving
+        the same member can't overwrite each other's debits.
+        An unguarded debit is applied even if the balance is too low.
+        """
+        if debit:
+            amount = debit.to_decimal()
+            if guarded:
+                cursor.execute("""UPDATE members
+                                SET balance = balance - %s
+                                WHERE id = %s AND (balance >= %s OR %s <= 0)""",
+                               (amount, member_id, amount, amount))
+            else:
+                cursor.execute("""UPDATE members
+                                SET balance = balance - %s
+                                WHERE id = %s""", (amount, member_id))
+            updated = cursor.rowcount
+
+        cursor.execute("""SELECT balance
+                            FROM members
+                            WHERE id = %s""", (member_id,))
+        result = cursor.fetchone()
+        if result is None:
+            raise BalanceConflict(f"Member ID:{member_id} no longer exists.")
+        balance = Money.parse(result[0])
+        if debit and updated != 1:
+            if balance < debit:
+                raise InsufficientFunds(f"Member ID:{member_id} has {balance.format()}, "
+                                        f"{debit.format()} needed.")
+            raise BalanceConflict(f"Balance of member ID:{member_id} was not updated.")
+        return balance
+
+    @staticmethod
+    def order_uuids(cart_uuid:str, count:int) -> list:
+        """
+        Returns the UUIDs of the orders of a cart, derived from its UUID.
+        """
+        namespace = uuid.UUID(cart_uuid)
+        return [str(uuid.uuid5(namespace, str(index))) for index in range(count)]
+
+    def _cart_written(self, cursor, cart_uuid:str) -> bool:
+        """
+        Returns True if the orders of the cart are in the database.
+        """
+        cursor.execute("""SELECT 1 FROM orders
+                            WHERE order_uuid = %s LIMIT 1""",
+                       (self.order_uuids(cart_uuid, 1)[0],))
+        return cursor.fetchone() is not None
+
     @logging_request
-    def update_balance(self, member:Member) -> None:
+    def cart_written(self, cart_uuid:str) -> bool:
         """
-        Updates the balance of the given member in the database.
+        Returns True if the cart with the given UUID has been written.
         """
-        if member is None:
-            return
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            return self._cart_written(cursor, cart_uuid)
 
-        self.cursor.execute("""UPDATE members
-                            SET balance = %s
-                            WHERE id = %s""", (member.balance, member.member_id))
-        self.connection.commit()
+    def _write_cart(self, cursor, member_id:int, debit:Money,
+                    orders:list, cart_uuid:str=None, guarded:bool=True) -> Money:
+        """
+        Writes a cart inside the caller's transaction.
+        Every order gets a UUID derived from the cart's UUID, so a cart
+        already written is detected and skipped (None is returned).
+        Returns the new balance of the member otherwise.
+        """
+        order_uuids = [None]*len(orders)
+        if cart_uuid is not None:
+            order_uuids = self.order_uuids(cart_uuid, len(orders))
+            if self._cart_written(cursor, cart_uuid):
+                self.loggers.log.debug(f"Cart {cart_uuid} already written, skipped.")
+                return None
 
-        self.loggers.log.debug(f"Member {member.first_name} (ID:{member.card_id}) Balance: {member.balance}")
+        balance = self._apply_debit(cursor, member_id, debit, guarded=guarded)
+        rows = [(product_id, member_id, (price*amount).to_decimal(), amount, order_uuid)
+                for (product_id, price, amount), order_uuid in zip(orders, order_uuids)]
+        cursor.executemany("""INSERT INTO orders (product_id, member_id, price, amount, order_uuid)
+                               VALUES (%s, %s, %s, %s, %s)
+                            """, rows)
+        return balance
 
     @logging_request
-    def send_order(self, product_id:int=None, member_id:int=None,
-                     price:decimal.Decimal=None, amount:int=None) -> None:
+    def commit_cart(self, member_id:int=None, debit:Money=Money(),
+                    orders:list=None, cart_uuid:str=None) -> Money:
         """
-        Sends a command to the database.
+        Writes a whole cart in a single transaction:
+        the debit of the member's balance and one order per line of the cart.
+        Each order is a (product_id, price, amount) tuple.
+        Nothing is written if any statement fails.
+
+        Returns the new balance of the member, or None if the cart
+        is already written (by the replay of the journal).
+        Raises InsufficientFunds or BalanceConflict if the debit is refused.
         """
-        self.cursor.execute("""INSERT INTO orders (product_id, member_id, price, amount)
-                               VALUES (%s, %s, %s, %s)
-                            """, (product_id, member_id, price*amount, amount))
-        self.connection.commit()
+        if member_id is None or not orders:
+            return None
+
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            try:
+                balance = self._write_cart(cursor, member_id, debit, orders, cart_uuid)
+            except IntegrityError as err:
+                # Another writer may have committed the same cart meanwhile.
+                connection.rollback()
+                if cart_uuid is None or err.errno != errorcode.ER_DUP_ENTRY \
+                        or not self._cart_written(cursor, cart_uuid):
+                    raise
+                self.loggers.log.debug(f"Cart {cart_uuid} written meanwhile, skipped.")
+                return None
+            connection.commit()
+
+        self.loggers.log.debug(f"Cart of member ID:{member_id} committed ({len(orders)} orders).")
+        return balance
+
+    @logging_request
+    def replay_carts(self, carts:list) -> None:
+        """
+        Writes journaled carts in a single transaction.
+        Each cart is a (uuid, member_id, card_id, debit, orders) tuple.
+
+        The carts have already been paid on the Marco while the database
+        was unreachable, so their debits are applied even if the balance
+        is too low. Carts already written are skipped.
+        Raises BalanceConflict if a member no longer exists.
+        """
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            for cart_uuid, member_id, card_id, debit, orders in carts:
+                balance = self._write_cart(cursor, member_id, debit, orders,
+                                           cart_uuid, guarded=False)
+                if balance is not None:
+                    self.remember_balance(card_id, balance)
+            connection.commit()
+
+    def history_query(self, limit:int=10, before:tuple=None, after:tuple=None,
+                      member_id:int=None, product_id:int=None,
+                      since=None, until=None) -> tuple:
+        """
+        Builds the query of get_history.
+        Returns the SQL request and its parameters.
+        """
+        conditions = ["""((orders.price >= 0 AND orders.product_id IS NOT NULL)
+                          OR (orders.price < 0 AND orders.product_id IS NULL))"""]
+        params = []
+        if member_id is not None:
+            conditions.append("orders.member_id = %s")
+            params.append(member_id)
+        if product_id is not None:
+            conditions.append("orders.product_id = %s")
+            params.append(product_id)
+        if since is not None:
+            conditions.append("orders.date >= %s")
+            params.append(since)
+        if until is not None:
+            conditions.append("orders.date < %s")
+            params.append(until)
+        if before is not None:
+            conditions.append("(orders.date < %s OR (orders.date = %s AND orders.id < %s))")
+            params.extend((before[0], before[0], before[1]))
+        if after is not None:
+            conditions.append("(orders.date > %s OR (orders.date = %s AND orders.id > %s))")
+            params.extend((after[0], after[0], after[1]))
+        params.append(limit)
+
+        query = f"""SELECT members.first_name AS member_first_name,
+                                    CASE WHEN orders.product_id IS NULL THEN 'rechargement'
+                                        ELSE products.name END AS product_name,
+                                    orders.price,
+                                    orders.amount,
+                                    orders.date,
+                                    orders.id
+                                    FROM orders
+                                    INNER JOIN members ON orders.member_id = members.id
+                                    LEFT JOIN products ON orders.product_id = products.id
+                                    WHERE {" AND ".join(conditions)}
+                                    ORDER BY orders.date DESC, orders.id DESC
+                                    LIMIT %s
+                                """
+        return query, tuple(params)
 
     @logging_request
-    def get_history(self) -> list:
-        """
-        Retrieves the history of the given member, including member and product names.
-        """
-        self.cursor.execute("""SELECT members.first_name AS member_first_name,
-                                CASE WHEN products.name IS NULL AND orders.price < 0 THEN 'Rechargement'
-                                    ELSE products.name END AS product_name,
-                                orders.price,
-                                orders.amount,
-                                orders.date
-                                FROM orders
-                                INNER JOIN members ON orders.member_id = members.id
-                                LEFT JOIN products ON orders.product_id = products.id
-                                WHERE orders.price >= 0 AND orders.product_id IS NOT NULL
-                                UNION
-                                SELECT members.first_name AS member_first_name,
-                                'rechargement' AS product_name,
-                                orders.price,
-                                orders.amount,
-                                orders.date
-                                FROM orders
-                                INNER JOIN members ON orders.member_id = members.id
-                                WHERE orders.price < 0 AND orders.product_id IS NULL
-                                ORDER BY date DESC
-                                LIMIT 10;
-                            """)
-        return self.cursor.fetchall()
+    def get_history(self, limit:int=10, before:tuple=None, after:tuple=None,
+                    member_id:int=None, product_id:int=None,
+                    since=None, until=None) -> list:
+        """
+        Retrieves the history of the orders, including member and product names.
+        Each row is (member_first_name, product_name, price, amount, date, id),
+        newest first.
 
+        Pages are read with keyset pagination on (date, id): `before` gives
+        the (date, id) of the last row of the previous page, `after` the
+        (date, id) of the newest row already known. The history can be
+        filtered by member, by product and by date range [since, until).
+        """
+        query, params = self.history_query(limit=limit, before=before, after=after,
+                                           member_id=member_id, product_id=product_id,
+                                           since=since, until=until)
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
@@ -0,0 +1,194 @@
+"""
+db_pool.py
+
+Defines the DBPool class which keeps a fixed number
+of connections to the database ready to be borrowed.
+"""
+
+#-------------------------------------------------------------------#
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+import mysql.connector as mysql
+from mysql.connector import errors
+from mysql.connector.errors import Error as MySQLError
+
+#-------------------------------------------------------------------#
+
+# Errors meaning that the database can't be reached (as opposed to
+# a request refused by the database, which retrying won't fix).
+CONNECTION_ERRORS = (errors.InterfaceError, errors.OperationalError, errors.PoolError)
+
+#-------------------------------------------------------------------#
+
+class DBPool:
+    """
+    Pool of connections to the MySQL database.
+
+    Connections are opened on demand up to `size`, health-checked
+    when they are borrowed and reconnected if the server dropped them.
+    """
+    DEFAULT_SIZE = 3
+    CHECKOUT_TIMEOUT = 10 # Seconds to wait for a free connection
+    HEALTH_CHECK_AFTER = 5 # Idle seconds after which a connection is pinged
+    RECONNECT_ATTEMPTS = 3
+
+    def __init__(self, loggers, logins, size:int=DEFAULT_SIZE) -> None:
+        """
+        DBPool's constructor.
+        No connection is opened until `open` or `checkout` is called.
+        """
+        self.loggers = loggers
+        self._logins = logins
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def _new_connection(self):
+        """
+        Opens a new connection and prepares its session.
+        """
+        connection = mysql.connect(host=self._logins.get_host(),
+                                   database=self._logins.get_database(),
+                                   user=self._logins.get_user(),
+                                   password=self._logins.get_password(),
+                                   port=self._logins.get_port())
+        self._setup_session(connection)
+        return connection
+
+    def _setup_session(self, connection) -> None:
+        """
+        Applies the session settings every connection must have.
+        """
+        cursor = connection.cursor()
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+        cursor.close()
+
+    def open(self) -> bool:
+        """
+        Opens the first connection of the pool.
+        Raises the connector's error if the database can't be reached.
+        """
+        with self._lock:
+            self._opened += 1
+        try:
+            connection = self._new_connection()
+        except MySQLError:
+            with self._lock:
+                self._opened -= 1
+            raise
+        self._idle.put((connection, time.monotonic()))
+        self.loggers.log.debug(f"Connection pool opened (size {self.size}).")
+        return True
+
+    def _healthy(self, connection, last_used:float):
+        """
+        Returns a working connection, reconnecting it if needed.
+        Raises the connector's error if it can't be revived.
+        """
+        if time.monotonic() - last_used < self.HEALTH_CHECK_AFTER:
+            return connection
+        if connection.is_connected():
+            return connection
+
+        self.loggers.log.warning("Pooled connection lost, reconnecting...")
+        connection.reconnect(attempts=self.RECONNECT_ATTEMPTS, delay=0.5)
+        self._setup_session(connection)
+        return connection
+
+    def checkout(self):
+        """
+        Borrows a connection from the pool.
+        Waits up to CHECKOUT_TIMEOUT seconds when every connection is in use.
+        """
+        if self._closed:
+            raise errors.InterfaceError("The connection pool is closed.")
+
+        try:
+            connection, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    return self._new_connection()
+                except MySQLError:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            try:
+                connection, last_used = self._idle.get(timeout=self.CHECKOUT_TIMEOUT)
+            except queue.Empty as err:
+                raise errors.PoolError("No database connection available.") from err
+
+        try:
+            return self._healthy(connection, last_used)
+        except MySQLError:
+            self._discard(connection)
+            raise
+
+    def checkin(self, connection) -> None:
+        """
+        Gives a borrowed connection back to the pool.
+        """
+        if self._closed:
+            self._discard(connection)
+            return
+        self._idle.put((connection, time.monotonic()))
+
+    def _discard(self, connection) -> None:
+        """
+        Closes a connection and frees its slot in the pool.
+        """
+        with self._lock:
+            self._opened -= 1
+        try:
+            connection.close()
+        except MySQLError:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a `with` block.
+        An uncommitted transaction is rolled back if the block fails.
+        """
+        connection = self.checkout()
+        try:
+            yield connection
+        except BaseException:
+            self._release_after_error(connection)
+            raise
+        self.checkin(connection)
+
+    def _release_after_error(self, connection) -> None:
+        """
+        Rolls back a failed block's transaction before recycling its connection.
+        The connection is dropped instead if it can't even roll back.
+        """
+        try:
+            connection.rollback()
+        except MySQLError:
+            self._discard(connection)
+            return
+        self.checkin(connection)
+
+    def close(self) -> bool:
+        """
+        Closes every idle connection of the pool.
+        Connections still borrowed are closed when given back.
+        """
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+        return True
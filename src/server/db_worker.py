@@ -0,0 +1,88 @@
+"""
+db_worker.py
+
+Defines the DBWorker class which runs the database requests
+on background threads so that the Tk main loop never blocks.
+"""
+
+#-------------------------------------------------------------------#
+
+from concurrent.futures import ThreadPoolExecutor
+
+#-------------------------------------------------------------------#
+
+class DBWorker:
+    """
+    Runs database requests on a thread pool and returns futures.
+
+    Callbacks are never called from the worker threads: the GUI calls
+    `poll` from its main loop (see GUI.poll_db_worker) and the callbacks
+    of the finished requests are run there, on the Tk thread.
+    """
+    POLL_INTERVAL = 50 # Milliseconds between two polls of the GUI
+
+    def __init__(self, app, max_workers:int=2) -> None:
+        """
+        DBWorker's constructor.
+        """
+        self.loggers = app.loggers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="DBWorker")
+        self._pending = []
+
+    @property
+    def busy(self) -> bool:
+        """
+        True while some request is running or waiting for its callback.
+        """
+        return bool(self._pending)
+
+    def submit(self, func:callable, *args, callback:callable=None,
+               errback:callable=None, **kwargs):
+        """
+        Runs func(*args, **kwargs) on a worker thread.
+        Once it is done, callback(result) or errback(exception)
+        is called on the Tk thread. Returns the future of the request.
+        """
+        future = self.executor.submit(func, *args, **kwargs)
+        self._pending.append((future, callback, errback or self.log_error))
+        return future
+
+    def poll(self) -> None:
+        """
+        Runs the callbacks of the finished requests.
+        Must be called from the Tk thread. A callback that fails
+        is logged and doesn't prevent the others from running.
+        """
+        if not self._pending:
+            return
+        done, pending = [], []
+        for request in self._pending:
+            (done if request[0].done() else pending).append(request)
+        self._pending = pending
+        for future, callback, errback in done:
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is not None:
+                    errback(error)
+                elif callback is not None:
+                    callback(future.result())
+            except Exception:
+                self.loggers.log.exception("Callback of a database request failed.")
+
+    def log_error(self, error:BaseException) -> None:
+        """
+        Default errback: logs the error of a failed request.
+        """
+        self.loggers.log.error("Database request failed: %s: %s",
+                               type(error).__name__, error)
+
+    def close(self) -> bool:
+        """
+        Stops the worker threads. Requests not started are cancelled.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._pending = []
+        return True
@@ -0,0 +1,210 @@
+"""
+journal.py
+
+Defines the Journal class, a local append-only record
+of the carts paid on the Marco, written before the database.
+"""
+
+#-------------------------------------------------------------------#
+
+import os
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from mysql.connector.errors import Error as MySQLError
+
+from src.server.db_cursor import BalanceError
+from src.server.db_pool import CONNECTION_ERRORS
+from src.server.migrations import SchemaOutdated, check_schema
+from src.utils.background_loop import BackgroundLoop
+from src.utils.money import Money
+
+#-------------------------------------------------------------------#
+
+class Journal(BackgroundLoop):
+    """
+    Write-ahead journal of the carts, stored in a local SQLite database.
+
+    Every cart is journaled (and synced to disk) with a client-generated
+    UUID before it is sent to MySQL. Carts that couldn't reach the
+    database stay pending and are replayed in batches by a background
+    thread once the connection comes back. The UUID is written with the
+    orders, so replaying a cart twice never charges it twice.
+    A cart the database refuses for another reason than a lost
+    connection is set aside as rejected, so it doesn't hold back
+    the carts journaled after it.
+    A cart still being sent by the payment is in flight: the replay
+    leaves it alone until it is released or marked.
+    """
+    PENDING = 0
+    FLUSHED = 1
+    REJECTED = 2
+    REPLAY_INTERVAL = 15 # Seconds
+    BATCH_SIZE = 20
+
+    def __init__(self, app, path:str=None) -> None:
+        """
+        Journal's constructor.
+        """
+        super().__init__("JournalReplay", join_timeout=self.REPLAY_INTERVAL)
+        self.loggers = app.loggers
+        self.path = path or os.path.join(os.getcwd(), "data", "journal", "journal.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS carts (
+                                        uuid TEXT PRIMARY KEY,
+                                        member_id INTEGER NOT NULL,
+                                        card_id INTEGER,
+                                        debit TEXT NOT NULL,
+                                        orders TEXT NOT NULL,
+                                        created REAL NOT NULL,
+                                        state INTEGER NOT NULL DEFAULT 0)""")
+        self._connection.execute("""CREATE INDEX IF NOT EXISTS carts_state
+                                        ON carts (state, created)""")
+        self._connection.commit()
+        self._in_flight = set() # UUIDs of the carts being sent by the payment
+
+    def append(self, member_id:int, card_id:int, debit:Money,
+               orders:list, cart_uuid:str=None, in_flight:bool=False) -> str:
+        """
+        Journals a cart before it is sent to the database.
+        Each order is a (product_id, price, amount) tuple.
+        An in-flight cart isn't replayed until it is released or marked.
+        Returns the UUID of the cart (a new one if none is given).
+        """
+        cart_uuid = cart_uuid or str(uuid.uuid4())
+        encoded = json.dumps([(product_id, str(price), amount)
+                              for product_id, price, amount in orders])
+        with self._lock:
+            self._connection.execute("""INSERT INTO carts
+                                        (uuid, member_id, card_id, debit, orders, created)
+                                        VALUES (?, ?, ?, ?, ?, ?)""",
+                                     (cart_uuid, member_id, card_id, str(debit),
+                                      encoded, time.time()))
+            self._connection.commit()
+            if in_flight:
+                self._in_flight.add(cart_uuid)
+        return cart_uuid
+
+    def release(self, cart_uuid:str) -> None:
+        """
+        Hands an in-flight cart over to the replay.
+        """
+        with self._lock:
+            self._in_flight.discard(cart_uuid)
+
+    def mark(self, cart_uuids:list, state:int) -> None:
+        """
+        Changes the state of journaled carts.
+        """
+        with self._lock:
+            self._connection.executemany("UPDATE carts SET state = ? WHERE uuid = ?",
+                                         [(state, cart_uuid) for cart_uuid in cart_uuids])
+            self._connection.commit()
+            self._in_flight.difference_update(cart_uuids)
+
+    def state(self, cart_uuid:str) -> int:
+        """
+        Returns the state of a journaled cart, or None if it isn't journaled.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT state FROM carts WHERE uuid = ?",
+                                           (cart_uuid,)).fetchone()
+        return None if row is None else row[0]
+
+    def pending(self, limit:int=BATCH_SIZE) -> list:
+        """
+        Returns the oldest carts not written to the database yet,
+        as (uuid, member_id, card_id, debit, orders) tuples.
+        The carts in flight are left out.
+        """
+        with self._lock:
+            rows = self._connection.execute("""SELECT uuid, member_id, card_id, debit, orders
+                                               FROM carts WHERE state = ?
+                                               ORDER BY created LIMIT ?""",
+                                            (self.PENDING,
+                                             limit + len(self._in_flight))).fetchall()
+            rows = [row for row in rows if row[0] not in self._in_flight][:limit]
+        return [(cart_uuid, member_id, card_id, Money.parse(debit),
+                 [(product_id, Money.parse(price), amount)
+                  for product_id, price, amount in json.loads(orders)])
+                for cart_uuid, member_id, card_id, debit, orders in rows]
+
+    def replay(self, db_cursor) -> int:
+        """
+        Writes the pending carts to the database, batch by batch.
+        Returns the number of carts flushed.
+        """
+        flushed = 0
+        while batch := self.pending():
+            try:
+                db_cursor.replay_carts(batch)
+            except CONNECTION_ERRORS:
+                raise
+            except (BalanceError, MySQLError):
+                # One cart of the batch is refused: replay them one by one.
+                flushed += self._replay_one_by_one(db_cursor, batch)
+                continue
+            self.mark([cart[0] for cart in batch], self.FLUSHED)
+            flushed += len(batch)
+        return flushed
+
+    def _replay_one_by_one(self, db_cursor, batch:list) -> int:
+        """
+        Replays the carts of a batch separately.
+        Carts refused by the database are marked as rejected.
+        """
+        flushed = 0
+        for cart in batch:
+            try:
+                db_cursor.replay_carts([cart])
+            except CONNECTION_ERRORS:
+                raise
+            except (BalanceError, MySQLError) as err:
+                self.loggers.log.error("Journaled cart %s rejected: %s", cart[0], err)
+                self.mark([cart[0]], self.REJECTED)
+                continue
+            self.mark([cart[0]], self.FLUSHED)
+            flushed += 1
+        return flushed
+
+    def _run(self, db_cursor) -> None:
+        """
+        Body of the background replay thread.
+        Nothing is replayed until the schema of the database is up to date.
+        """
+        schema_checked = False
+        while not self._stop.wait(self.REPLAY_INTERVAL):
+            try:
+                if not schema_checked:
+                    check_schema(db_cursor.pool, self.loggers)
+                    schema_checked = True
+                flushed = self.replay(db_cursor)
+            except CONNECTION_ERRORS as err:
+                self.loggers.log.debug("Journal replay postponed: %s", err)
+                continue
+            except SchemaOutdated as err:
+                self.loggers.log.error("Journal replay postponed: %s", err)
+                continue
+            if flushed:
+                self.loggers.log.info("%s journaled carts written to the database.", flushed)
+
+    def start_replay(self, db_cursor) -> None:
+        """
+        Starts the background replay thread.
+        """
+        self.start(db_cursor)
+
+    def close(self) -> bool:
+        """
+        Stops the replay thread and closes the journal.
+        """
+        self.stop()
+        with self._lock:
+            self._connection.close()
+        return True
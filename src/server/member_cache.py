@@ -0,0 +1,102 @@
+"""
+member_cache.py
+
+Defines the MemberCache class which keeps the members
+recently scanned in memory to avoid a database round trip.
+"""
+
+#-------------------------------------------------------------------#
+
+import threading
+import time
+from collections import OrderedDict
+
+#-------------------------------------------------------------------#
+
+class MemberCache:
+    """
+    LRU cache of the members data, keyed by card number.
+
+    Entries expire after `ttl` seconds. The balance of a cached member
+    is written through by the payment service and the entry is dropped
+    when the database refuses a debit.
+    """
+    DEFAULT_SIZE = 256
+    DEFAULT_TTL = 300 # Seconds
+
+    def __init__(self, loggers, size:int=DEFAULT_SIZE, ttl:float=DEFAULT_TTL) -> None:
+        """
+        MemberCache's constructor.
+        """
+        self.loggers = loggers
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, card_id:int) -> dict:
+        """
+        Returns a copy of the cached member data, None if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(card_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, member_data = entry
+            if expires_at < time.monotonic():
+                del self._entries[card_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(card_id)
+            self.hits += 1
+            return dict(member_data)
+
+    def put(self, card_id:int, member_data:dict) -> None:
+        """
+        Caches the data of a member.
+        """
+        with self._lock:
+            self._entries[card_id] = (time.monotonic() + self.ttl, dict(member_data))
+            self._entries.move_to_end(card_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def update_balance(self, card_id:int, balance) -> None:
+        """
+        Writes a new balance through to the cached member, if any.
+        """
+        with self._lock:
+            entry = self._entries.get(card_id)
+            if entry is not None:
+                entry[1]['balance'] = balance
+
+    def invalidate(self, card_id:int) -> None:
+        """
+        Drops a member from the cache.
+        """
+        with self._lock:
+            self._entries.pop(card_id, None)
+
+    def clear(self) -> None:
+        """
+        Drops every member from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss statistics of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self._entries),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'hit_ratio': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,193 @@
+"""
+migrations.py
+
+Versioned migrations of the database schema used by MarcoNeo,
+and checks of the plans of the requests the application relies on.
+
+Usage (from the root of the project):
+    python -m src.server.migrations           # applies pending migrations
+    python -m src.server.migrations --status  # lists the migrations
+"""
+
+#-------------------------------------------------------------------#
+
+import argparse
+from contextlib import closing
+from mysql.connector import errorcode
+from mysql.connector.errors import Error as MySQLError, ProgrammingError
+
+from src.utils.loggers import Loggers
+from src.server.logins import Logins
+from src.server.db_pool import DBPool
+
+#-------------------------------------------------------------------#
+
+# (version, description, statements)
+MIGRATIONS = [
+    (1, "Unique index on the members card numbers",
+     ["CREATE UNIQUE INDEX members_card_number ON members (card_number)"]),
+    (2, "Indexes of the orders history",
+     ["CREATE INDEX orders_date_id ON orders (date, id)",
+      "CREATE INDEX orders_member_date ON orders (member_id, date)",
+      "CREATE INDEX orders_product_date ON orders (product_id, date)"]),
+    (3, "Client order UUID used to replay journaled carts",
+     ["ALTER TABLE orders ADD COLUMN order_uuid CHAR(36) NULL",
+      "CREATE UNIQUE INDEX orders_order_uuid ON orders (order_uuid)"]),
+    (4, "Last update of the members rows, read by the roster sync",
+     ["""ALTER TABLE members ADD COLUMN updated_at TIMESTAMP NOT NULL
+            DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP""",
+      "CREATE INDEX members_updated_at ON members (updated_at)"]),
+]
+
+# Errors meaning that a statement has already been applied by hand.
+ALREADY_APPLIED = (errorcode.ER_DUP_KEYNAME, errorcode.ER_DUP_FIELDNAME)
+
+#-------------------------------------------------------------------#
+
+class SchemaOutdated(Exception):
+    """
+    Raised when the database misses migrations the application relies on.
+    """
+
+#-------------------------------------------------------------------#
+
+class Migrator:
+    """
+    Applies the migrations of MIGRATIONS that are not applied yet.
+    Applied versions are recorded in the schema_migrations table,
+    which only `migrate` creates: reading them needs no privilege
+    to change the schema.
+    """
+    def __init__(self, pool, loggers) -> None:
+        """
+        Migrator's constructor.
+        """
+        self.pool = pool
+        self.loggers = loggers
+
+    def create_table(self) -> None:
+        """
+        Creates the schema_migrations table if it doesn't exist.
+        """
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            cursor.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                                version INT PRIMARY KEY,
+                                description VARCHAR(255) NOT NULL,
+                                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)""")
+
+    def applied_versions(self) -> set:
+        """
+        Returns the versions already applied to the database
+        (none if the schema_migrations table doesn't exist yet).
+        """
+        with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.execute("SELECT version FROM schema_migrations")
+            except ProgrammingError as err:
+                if err.errno != errorcode.ER_NO_SUCH_TABLE:
+                    raise
+                return set()
+            return {row[0] for row in cursor.fetchall()}
+
+    def pending(self) -> list:
+        """
+        Returns the migrations not applied yet, in order.
+        """
+        applied = self.applied_versions()
+        return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+    def migrate(self, target:int=None) -> int:
+        """
+        Applies the pending migrations up to the target version (included).
+        Returns the number of migrations applied.
+        """
+        self.create_table()
+        count = 0
+        for version, description, statements in self.pending():
+            if target is not None and version > target:
+                break
+            self.loggers.log.info("Applying migration %s: %s", version, description)
+            with self.pool.connection() as connection, closing(connection.cursor()) as cursor:
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except MySQLError as err:
+                        if err.errno not in ALREADY_APPLIED:
+                            raise
+                        self.loggers.log.info("Already applied: %s", statement)
+                cursor.execute("""INSERT INTO schema_migrations (version, description)
+                                    VALUES (%s, %s)""", (version, description))
+                connection.commit()
+            count += 1
+        return count
+
+#-------------------------------------------------------------------#
+
+def check_schema(pool, loggers) -> None:
+    """
+    Raises SchemaOutdated if some migration isn't applied to the database.
+    Raises the connector's error if the database can't be reached.
+    Only reads the database.
+    """
+    pending = Migrator(pool, loggers).pending()
+    if pending:
+        versions = ", ".join(str(migration[0]) for migration in pending)
+        raise SchemaOutdated(f"Migrations {versions} are not applied, "
+                             "run `python -m src.server.migrations`.")
+
+def check_query_plans(db_cursor) -> list:
+    """
+    Runs EXPLAIN on the hot requests of the application
+    (member lookup and first page of the history) and logs a warning
+    for each table they read with a full scan.
+    Returns the names of the tables fully scanned.
+    """
+    history_query, history_params = db_cursor.history_query()
+    queries = {"get_member": (db_cursor.MEMBER_QUERY, (0,)),
+               "get_history": (history_query, history_params)}
+
+    full_scans = []
+    with db_cursor.pool.connection() as connection, closing(connection.cursor()) as cursor:
+        for name, (query, params) in queries.items():
+            cursor.execute("EXPLAIN " + query, params)
+            columns = cursor.column_names
+            for row in cursor.fetchall():
+                plan = dict(zip(columns, row))
+                if plan.get("type") == "ALL":
+                    full_scans.append(plan.get("table"))
+                    db_cursor.loggers.log.warning(
+                        "%s does a full scan of table %s, run "
+                        "`python -m src.server.migrations`.", name, plan.get("table"))
+    return full_scans
+
+#-------------------------------------------------------------------#
+
+def main() -> None:
+    """
+    Entrypoint of the migration tool.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.server.migrations",
+                                     description="Migrates MarcoNeo's database schema.")
+    parser.add_argument("--status", action="store_true",
+                        help="lists the migrations and whether they are applied")
+    parser.add_argument("--target", type=int, default=None,
+                        help="last version to apply")
+    args = parser.parse_args()
+
+    loggers = Loggers("MIGRATIONS")
+    pool = DBPool(loggers, Logins(), size=1)
+    migrator = Migrator(pool, loggers)
+    try:
+        if args.status:
+            applied = migrator.applied_versions()
+            for version, description, _ in MIGRATIONS:
+                state = "applied" if version in applied else "pending"
+                print(f"{version:>3} [{state}] {description}")
+            return
+        count = migrator.migrate(args.target)
+        print(f"{count} migration(s) applied.")
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ Let the user pay for his purchases.
 
 #-------------------------------------------------------------------#
 
+from mysql.connector.errors import Error as MySQLError
+from src.server.db_cursor import BalanceError, InsufficientFunds, BalanceConflict
+from src.server.db_pool import CONNECTION_ERRORS
+from src.utils.money import Money
 
 #-------------------------------------------------------------------#
 
@@ -16,48 +20,108 @@ class PaymentService:
     """
     def __init__(self, app) -> None:
         self.app = app
-        self.current_user = app.current_user
-        self.cart = self.app.cart
         self.loggers = app.loggers
 
-    def purchase(self):
+    def checkout(self, member, cart) -> tuple:
         """
-        Confirms the purchase.
+        Returns what is paid for the cart of the member, as a
+        (member_id, card_id, balance, debit, orders) tuple.
+        Must be called from the Tk thread: the payment itself only
+        reads this copy, never the live member and cart.
         """
-        if self.current_user.card_id is None:
-            self.loggers.log.warning("No user is logged in. Can't purchase.")
-            return
-
-        for item in self.cart.items:
-            member_id = self.current_user.member_id
-            product_id = list(item.keys())[0]
-            values = list(item.values())[0]
-            price = values[1]
-            quantity = values[0]
-
+        debit = Money()
+        orders = []
+        for line in cart.lines():
             # If the product is None, it means the user is adding money to his account.
             # Only products with null id are refillments.
-            if product_id is None:
-                self.current_user.balance += price*quantity
+            if line.product_id is None:
+                debit -= line.subtotal
             else:
-                self.current_user.balance -= price*quantity
+                debit += line.subtotal
+            orders.append((line.product_id, line.unit_price, line.quantity))
+        return member.member_id, member.card_id, member.balance, debit, orders
+
+    def purchase(self, checkout:tuple) -> bool:
+        """
+        Confirms the purchase of a checkout (see `checkout`).
+        Returns True if the cart has been paid, False if no member is logged in.
+        Raises InsufficientFunds or BalanceConflict if the debit is refused,
+        and the database's errors other than a lost connection.
+        """
+        member_id, card_id, _, _, _ = checkout
+        if card_id is None:
+            self.loggers.log.warning("No user is logged in. Can't purchase.")
+            return False
 
-            self.commit_purchase(product_id=product_id,
-                                 member_id=member_id,
-                                 price=price,
-                                 quantity=quantity)
+        # The checkout is recorded first, to be settled after a crash.
+        cart_uuid = self.app.session.begin_checkout()
+        try:
+            self.commit_purchase(checkout, cart_uuid=cart_uuid)
+        except (BalanceError, MySQLError):
+            # Nothing was paid: the cart is kept.
+            self.app.session.cancel_checkout()
+            raise
+        self.app.session.end_checkout()
+        self.loggers.log.info("Purchase of member ID:%s confirmed.", member_id)
+        return True
 
-    def commit_purchase(self, product_id:int=None, member_id:int=None,
-                        price:int=None, quantity:int=None) -> None:
+    def commit_purchase(self, checkout:tuple, cart_uuid:str=None) -> Money:
         """
         Confirms the purchase.
+        The whole cart is written in a single transaction and the balance
+        is debited by the database, which reports refused debits.
+        Returns the new balance of the member.
+
+        The cart is journaled first: if the database can't be reached,
+        it is kept in the journal and written once the connection is back.
+        Other errors of the database are raised, the cart isn't paid.
         """
-        self.app.db_cursor.update_balance(self.current_user)
-        self.app.db_cursor.send_order(product_id=product_id,
-                                        member_id=member_id,
-                                        price=price,
-                                        amount=quantity)
-
-        self.loggers.log.info("Purchase confirmed. New balance of %s is %s€.",
-                              self.current_user.first_name, self.current_user.balance)
-        print(f"Purchase confirmed. Your new balance is {self.current_user.balance}€.")
+        member_id, card_id, balance, debit, orders = checkout
+        if not orders:
+            return balance
+
+        journal = self.app.journal
+        # In flight: the replay thread doesn't send it at the same time.
+        cart_uuid = journal.append(member_id, card_id, debit, orders, cart_uuid,
+                                   in_flight=True)
+        try:
+            new_balance = self.app.db_cursor.commit_cart(member_id=member_id,
+                                                         debit=debit,
+                                                         orders=orders,
+                                                         cart_uuid=cart_uuid)
+        except CONNECTION_ERRORS as err:
+            journal.release(cart_uuid)
+            # The cart stays pending in the journal.
+            self.loggers.log.warning("Database unreachable, cart %s journaled: %s",
+                                     cart_uuid, err)
+            new_balance = balance - debit
+            self.app.db_cursor.remember_balance(card_id, new_balance)
+            print(f"Purchase saved offline. Your new balance is {new_balance.format()}.")
+            return new_balance
+        except MySQLError as err:
+            # Refused by the database: replaying it wouldn't do better.
+            journal.mark([cart_uuid], journal.REJECTED)
+            self.loggers.log.error("Purchase of cart %s failed: %s", cart_uuid, err)
+            raise
+        except InsufficientFunds as err:
+            journal.mark([cart_uuid], journal.REJECTED)
+            self.app.db_cursor.forget_member(card_id)
+            self.loggers.log.warning("Purchase refused: %s", err)
+            raise
+        except BalanceConflict as err:
+            journal.mark([cart_uuid], journal.REJECTED)
+            self.app.db_cursor.forget_member(card_id)
+            self.loggers.log.error("Purchase aborted: %s", err)
+            raise
+
+        journal.mark([cart_uuid], journal.FLUSHED)
+        if new_balance is None:
+            # Written already: the balance is read again on the next scan.
+            self.app.db_cursor.forget_member(card_id)
+            return balance - debit
+        self.app.db_cursor.remember_balance(card_id, new_balance)
+
+        self.loggers.log.info("Purchase confirmed. New balance of member ID:%s is %s€.",
+                              member_id, new_balance)
+        print(f"Purchase confirmed. Your new balance is {new_balance.format()}.")
+        return new_balance
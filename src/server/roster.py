@@ -0,0 +1,176 @@
+"""
+roster.py
+
+Defines the Roster class, an in-memory index of the whole
+members table kept up to date by a background thread.
+"""
+
+#-------------------------------------------------------------------#
+
+import threading
+from contextlib import closing
+from mysql.connector.errors import Error as MySQLError
+
+from src.utils.background_loop import BackgroundLoop
+from src.utils.money import Money
+
+#-------------------------------------------------------------------#
+
+class MemberRecord:
+    """
+    Compact record of a member of the roster.
+    """
+    __slots__ = ('member_id', 'first_name', 'last_name', 'card_number',
+                 'balance', 'admin', 'contributor')
+
+    def __init__(self, row:tuple) -> None:
+        (self.member_id, self.first_name, self.last_name, self.card_number,
+         self.balance, self.admin, self.contributor) = row[:7]
+        self.balance = Money.parse(self.balance)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the member data as returned by DBCursor.get_member.
+        """
+        return {'id':self.member_id,
+                'first_name':self.first_name,
+                'last_name':self.last_name,
+                'card_number':self.card_number,
+                'balance':self.balance,
+                'admin':self.admin,
+                'contributor':self.contributor}
+
+class Roster(BackgroundLoop):
+    """
+    Index of every member, keyed by card number.
+
+    The whole members table is loaded once in a streamed query, then
+    a background thread fetches the rows changed since the last sync.
+    Rows are tracked with the `updated_at` column (migration 4), so
+    balances changed by other terminals are seen by the next sync.
+    On a database without it, they are tracked with the member id
+    (new members only) and the whole table is reloaded every
+    FULL_RELOAD_EVERY syncs.
+    """
+    SYNC_INTERVAL = 30 # Seconds
+    FETCH_SIZE = 500
+    FULL_RELOAD_EVERY = 10
+    COLUMNS = "id, first_name, last_name, card_number, balance, admin, contributor"
+
+    def __init__(self, db_cursor, sync_interval:float=SYNC_INTERVAL) -> None:
+        """
+        Roster's constructor.
+        """
+        super().__init__("RosterSync", join_timeout=sync_interval)
+        self.db_cursor = db_cursor
+        self.loggers = db_cursor.loggers
+        self.sync_interval = sync_interval
+        self._by_card = {}
+        self._card_of = {} # member id -> card number
+        self._lock = threading.Lock()
+        self._watermark_column = "id"
+        self._watermark = None
+        self._syncs = 0
+
+    def __len__(self) -> int:
+        return len(self._by_card)
+
+    def get(self, card_id:int) -> dict:
+        """
+        Returns the data of the member with the given card, None if unknown.
+        """
+        record = self._by_card.get(card_id)
+        if record is None:
+            return None
+        return record.to_dict()
+
+    def update_balance(self, card_id:int, balance) -> None:
+        """
+        Writes a new balance through to the member's record.
+        """
+        record = self._by_card.get(card_id)
+        if record is not None:
+            record.balance = balance
+
+    def invalidate(self, card_id:int) -> None:
+        """
+        Drops a member until the next sync brings it back.
+        """
+        with self._lock:
+            record = self._by_card.pop(card_id, None)
+            if record is not None:
+                self._card_of.pop(record.member_id, None)
+
+    def _index(self, rows) -> None:
+        """
+        Inserts or replaces records in the index.
+        """
+        with self._lock:
+            for row in rows:
+                record = MemberRecord(row)
+                old_card = self._card_of.get(record.member_id)
+                if old_card is not None and old_card != record.card_number:
+                    self._by_card.pop(old_card, None)
+                self._by_card[record.card_number] = record
+                self._card_of[record.member_id] = record.card_number
+                if self._watermark is None or row[7] > self._watermark:
+                    self._watermark = row[7]
+
+    def _stream(self, query:str, params:tuple=()) -> int:
+        """
+        Runs a query on the members table and indexes its rows by batches.
+        Returns the number of rows read.
+        """
+        count = 0
+        with self.db_cursor.pool.connection() as connection, \
+             closing(connection.cursor()) as cursor:
+            cursor.execute(query, params)
+            while rows := cursor.fetchmany(self.FETCH_SIZE):
+                self._index(rows)
+                count += len(rows)
+        return count
+
+    def load(self) -> bool:
+        """
+        Loads the whole members table.
+        """
+        with self.db_cursor.pool.connection() as connection, \
+             closing(connection.cursor()) as cursor:
+            cursor.execute("SHOW COLUMNS FROM members LIKE 'updated_at'")
+            if cursor.fetchall():
+                self._watermark_column = "updated_at"
+
+        column = self._watermark_column
+        count = self._stream(f"SELECT {self.COLUMNS}, {column} FROM members ORDER BY {column}")
+        self.loggers.log.info("Roster loaded: %s members (watermark on %s).", count, column)
+        return True
+
+    def sync(self) -> int:
+        """
+        Fetches the members changed since the last sync.
+        Returns the number of rows read.
+        """
+        self._syncs += 1
+        column = self._watermark_column
+        if column == "id" and self._syncs % self.FULL_RELOAD_EVERY == 0:
+            return self._stream(f"SELECT {self.COLUMNS}, id FROM members")
+        if self._watermark is None:
+            return self._stream(f"SELECT {self.COLUMNS}, {column} FROM members ORDER BY {column}")
+        # Rows updated during the same second as the watermark are read again.
+        operator = ">" if column == "id" else ">="
+        return self._stream(f"""SELECT {self.COLUMNS}, {column} FROM members
+                                WHERE {column} {operator} %s ORDER BY {column}""",
+                            (self._watermark,))
+
+    def _run(self) -> None:
+        """
+        Body of the background sync thread.
+        """
+        while not self._stop.wait(self.sync_interval):
+            try:
+                count = self.sync()
+            except MySQLError as err:
+                self.loggers.log.warning("Roster sync failed: %s", err)
+                continue
+            if count:
+                self.loggers.log.debug("Roster synced: %s members updated.", count)
@@ -0,0 +1,196 @@
+"""
+session_store.py
+
+Defines the SessionStore class, a snapshot on disk of the session
+in progress, used to recover it after a crash or a power loss.
+"""
+
+#-------------------------------------------------------------------#
+
+import os
+import json
+import threading
+import uuid
+
+from src.server.db_pool import CONNECTION_ERRORS
+from src.utils.background_loop import BackgroundLoop
+
+#-------------------------------------------------------------------#
+
+class SessionStore(BackgroundLoop):
+    """
+    Snapshot of the session in progress: the member logged in,
+    the lines of the cart and the UUID of the cart being paid.
+
+    Changes of the cart are written by a background thread, at most
+    once per FLUSH_INTERVAL, so taps don't wait for the disk. The start
+    and the end of a checkout are synced to disk before going on.
+    On startup, a checkout left in progress is compared with the
+    journal and the orders table: it is either known to be paid,
+    or rolled back and its cart resumed.
+    """
+    FLUSH_INTERVAL = 1 # Seconds
+    EMPTY = {"card_id": None, "member_id": None, "lines": [], "checkout": None}
+
+    def __init__(self, app, path:str=None) -> None:
+        """
+        SessionStore's constructor.
+        The snapshot left by the previous run is kept in `previous`.
+        """
+        super().__init__("SessionStore", join_timeout=self.FLUSH_INTERVAL)
+        self.loggers = app.loggers
+        self.path = path or os.path.join(os.getcwd(), "data", "session", "session.json")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.previous = self.load()
+        self._state = dict(self.EMPTY)
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """
+        Returns the snapshot on disk, or None if there is no session to recover.
+        """
+        try:
+            with open(self.path, 'r', encoding="utf-8") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as err:
+            self.loggers.log.error("Session snapshot unreadable: %s", err)
+            return None
+        if state.get("checkout") is None and not state.get("lines"):
+            return None
+        return state
+
+    def _write(self, state:dict) -> None:
+        """
+        Replaces the snapshot on disk and syncs it.
+        """
+        temporary = self.path + ".tmp"
+        with open(temporary, 'w', encoding="utf-8") as file:
+            json.dump(state, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            directory = os.open(os.path.dirname(self.path), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def flush(self) -> None:
+        """
+        Writes the snapshot if it changed since the last write.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            try:
+                self._write(self._state)
+            except OSError as err:
+                self._dirty = True
+                self.loggers.log.error("Session snapshot not written: %s", err)
+
+    def update(self, member, cart) -> None:
+        """
+        Records the member and the cart of the session.
+        They are written by the next flush.
+        """
+        lines = [[line.product_id, str(line.unit_price), line.quantity]
+                 for line in cart.lines()]
+        with self._lock:
+            self._state = {**self._state, "card_id": member.card_id,
+                           "member_id": member.member_id, "lines": lines}
+            self._dirty = True
+
+    def begin_checkout(self) -> str:
+        """
+        Marks the cart as being paid, synced to disk.
+        Returns the UUID of the cart, under which it is journaled.
+        """
+        cart_uuid = str(uuid.uuid4())
+        with self._lock:
+            self._state = {**self._state, "checkout": cart_uuid}
+            self._dirty = True
+        self.flush()
+        return cart_uuid
+
+    def cancel_checkout(self) -> None:
+        """
+        Unmarks the cart once its payment has been refused:
+        the session goes on with the same cart.
+        """
+        with self._lock:
+            self._state = {**self._state, "checkout": None}
+            self._dirty = True
+        self.flush()
+
+    def end_checkout(self) -> None:
+        """
+        Clears the session once its cart has been paid or refused.
+        """
+        with self._lock:
+            self._state = dict(self.EMPTY)
+            self._dirty = True
+        self.flush()
+
+    def recover(self, journal, db_cursor) -> dict:
+        """
+        Settles the checkout left in progress by the previous run, if any.
+        Returns the session to resume (card_id, member_id, lines),
+        or None if there is nothing to resume.
+        """
+        state, self.previous = self.previous, None
+        if state is None:
+            return None
+
+        cart_uuid = state.get("checkout")
+        if cart_uuid is not None:
+            journal_state = journal.state(cart_uuid)
+            try:
+                written = db_cursor.cart_written(cart_uuid)
+            except CONNECTION_ERRORS as err:
+                self.loggers.log.warning("Orders of cart %s can't be checked: %s",
+                                         cart_uuid, err)
+                written = False
+            if written:
+                if journal_state == journal.PENDING:
+                    journal.mark([cart_uuid], journal.FLUSHED)
+                db_cursor.forget_member(state.get("card_id"))
+                self.loggers.log.info("Interrupted checkout %s was paid.", cart_uuid)
+                return None
+            if journal_state in (journal.PENDING, journal.FLUSHED):
+                # The replay of the journal writes it.
+                self.loggers.log.info("Interrupted checkout %s was paid offline.", cart_uuid)
+                return None
+            # Never journaled or refused: nothing was paid.
+            self.loggers.log.warning("Interrupted checkout %s rolled back.", cart_uuid)
+
+        if state.get("card_id") is None or not state.get("lines"):
+            return None
+        self.loggers.log.info("Session of card ID:%s can be resumed (%s lines).",
+                              state["card_id"], len(state["lines"]))
+        return {"card_id": state["card_id"], "member_id": state.get("member_id"),
+                "lines": state["lines"]}
+
+    def _run(self) -> None:
+        """
+        Body of the background flush thread.
+        """
+        while not self._stop.wait(self.FLUSH_INTERVAL):
+            self.flush()
+
+    def close(self) -> bool:
+        """
+        Stops the flush thread. The session ends with the application,
+        so the snapshot is cleared (but a session not recovered yet
+        is kept for the next run).
+        """
+        self.stop()
+        with self._lock:
+            self._state = self.previous or dict(self.EMPTY)
+            self._dirty = True
+        self.flush()
+        return True
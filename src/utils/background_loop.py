@@ -0,0 +1,56 @@
+"""
+background_loop.py
+
+Defines the BackgroundLoop class, the base of the services
+which work in a daemon thread of their own.
+"""
+
+#-------------------------------------------------------------------#
+
+import threading
+
+#-------------------------------------------------------------------#
+
+class BackgroundLoop:
+    """
+    Base of the services running a loop in a daemon thread.
+
+    Subclasses define `_run`, which returns once `_stop` is set
+    (usually `while not self._stop.wait(interval):`).
+    The thread is started once, and joined for at most
+    `join_timeout` seconds when the service stops.
+    """
+    def __init__(self, name:str, join_timeout:float=None) -> None:
+        """
+        BackgroundLoop's constructor.
+        `name` is the name of the thread.
+        """
+        self.thread_name = name
+        self.join_timeout = join_timeout
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self, *args) -> None:
+        """
+        Body of the thread.
+        """
+        raise NotImplementedError
+
+    def start(self, *args) -> None:
+        """
+        Starts the thread, which runs `_run(*args)`.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=args,
+                                        name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.join_timeout)
+            self._thread = None
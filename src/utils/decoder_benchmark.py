@@ -0,0 +1,78 @@
+"""
+decoder_benchmark.py
+
+Measures how many card numbers per second the decoders
+of the RFID reader can read.
+Run it with `python -m src.utils.decoder_benchmark`.
+"""
+
+#-------------------------------------------------------------------#
+
+import argparse
+import random
+import timeit
+
+from src.utils.hardware import DECODERS, LayoutDetector
+
+#-------------------------------------------------------------------#
+
+def per_call_table(buffer:str) -> int:
+    """
+    Decodes an AZERTY card number the way it was done before the
+    decoders: the translation table is built again on every call.
+    """
+    lut = dict(zip('&é"\'(-è_çà', "1234567890"))
+    try:
+        return int(buffer.translate(str.maketrans(lut)))
+    except ValueError:
+        return None
+
+def sample_scans(count:int, length:int=10, seed:int=0) -> dict:
+    """
+    Returns random card numbers as typed with each layout.
+    """
+    generator = random.Random(seed)
+    numbers = ["".join(generator.choice("0123456789") for _ in range(length))
+               for _ in range(count)]
+    azerty = str.maketrans("1234567890", '&é"\'(-è_çà')
+    qwerty = str.maketrans("1234567890", "!@#$%^&*()")
+    return {"azerty": [number.translate(azerty) for number in numbers],
+            "qwerty": [number.translate(qwerty) for number in numbers],
+            "numpad": numbers,
+            "hex": [f"{int(number):X}" for number in numbers]}
+
+def bench(label:str, decode:callable, scans:list, repeat:int) -> None:
+    """
+    Prints the best throughput of the decoding function over the scans.
+    """
+    def run():
+        for scan in scans:
+            decode(scan)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    print(f"{label:<24} {len(scans) / best:>12,.0f} scans/s")
+
+def main() -> None:
+    """
+    Entrypoint of the benchmark.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.utils.decoder_benchmark",
+                                     description="Measures the throughput of the card decoders.")
+    parser.add_argument("--scans", type=int, default=100_000,
+                        help="number of card numbers decoded per run")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of runs, the best one is kept")
+    args = parser.parse_args()
+
+    scans = sample_scans(args.scans)
+    bench("azerty (table per call)", per_call_table, scans["azerty"], args.repeat)
+    for name, decoder in DECODERS.items():
+        bench(name, decoder.decode, scans[name], args.repeat)
+    bench("hex (base 16)", lambda scan: DECODERS["numpad"].decode(scan, 16),
+          scans["hex"], args.repeat)
+    for name in DECODERS:
+        detector = LayoutDetector()
+        bench(f"detected ({name})", detector.decode, scans[name], args.repeat)
+    bench("detected (hex)", LayoutDetector(base=16).decode, scans["hex"], args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,11 @@ from mysql.connector import InterfaceError
 
 #-------------------------------------------------------------------#
 
-def setup_service(max_attempts:int=5) -> callable:
+def setup_service(max_attempts:int=5, required:bool=True) -> callable:
     """
     Setups to the service when its setup method is done.
     This way, the application will try to connect to the service safely.
+    If the service isn't required, the application keeps running without it.
     """
     def decorator_func(func:callable) -> callable:
         @functools.wraps(func)
@@ -34,6 +35,9 @@ def setup_service(max_attempts:int=5) -> callable:
                     loggers.log.debug(f"Unable to setup {class_name}: {type(setup_error).__name__}")
                 attempt += 1
                 sleep(.5)
+            if not required:
+                loggers.log.warning(f"Can't setup {class_name}. Running without it.")
+                return
             loggers.log.fatal(f"Can't setup {class_name}. Exiting the application.")
             print("CILcare agenda stopped.")
             sys.exit(1)
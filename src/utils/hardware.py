@@ -4,25 +4,138 @@ hardware.py
 Defines some hardware abstractions that are used in the application.
 """
 
-def key_to_number(buffer = "") -> int:
+#-------------------------------------------------------------------#
+
+import re
+import string
+
+#-------------------------------------------------------------------#
+
+# Card numbers typed, once translated, by base.
+NUMBER_PATTERNS = {10: re.compile(f"[{string.digits}]+"),
+                   16: re.compile(f"[{string.hexdigits}]+")}
+
+class CardDecoder:
     """
-    Converts a string to an integer.
+    Turns the characters typed by the RFID reader into a card number.
+
+    The reader is a keyboard: what it types depends on the keyboard
+    layout it believes in. Each decoder translates the digits of one
+    layout, with a translation table compiled once. The base of the
+    card numbers is a setting of the reader (see RFID.CARD_BASE),
+    it is never guessed.
+    """
+    __slots__ = ("name", "table")
+
+    def __init__(self, name:str, keys:dict) -> None:
+        """
+        CardDecoder's constructor.
+        `keys` maps the characters typed to the digits they stand for.
+        """
+        self.name = name
+        self.table = str.maketrans(keys)
+
+    def decode(self, buffer:str, base:int=10) -> int:
+        """
+        Returns the card number typed, or None if it can't be read.
+        """
+        translated = buffer.translate(self.table)
+        if NUMBER_PATTERNS[base].fullmatch(translated) is None:
+            return None
+        return int(translated, base)
+
+    def __repr__(self) -> str:
+        return f"CardDecoder({self.name!r})"
+
+#-------------------------------------------------------------------#
+
+DIGITS = {digit: digit for digit in string.digits}
+
+# Decoders of the keyboard layouts, by name.
+DECODERS = {}
+
+def register_decoder(decoder:CardDecoder) -> CardDecoder:
     """
-    LUT = {
-        '&': '1',
-        'é': '2',
-        '"': '3',
-        "'": '4',
-        '(': '5',
-        '-': '6',
-        'è': '7',
-        '_': '8',
-        'ç': '9',
-        'à': '0'
-    }
-    trans_table = str.maketrans(LUT)
-    try:
-        id_in_buffer = int(buffer.translate(trans_table))
-    except ValueError:
-        return None
-    return id_in_buffer
\ No newline at end of file
+    Adds a decoder to the registry.
+    """
+    DECODERS[decoder.name] = decoder
+    return decoder
+
+# Digit row of a French keyboard, without and with shift
+register_decoder(CardDecoder("azerty", {**DIGITS, **dict(zip('&é"\'(-è_çà', "1234567890"))}))
+# Digit row of an English keyboard, without and with shift
+register_decoder(CardDecoder("qwerty", {**DIGITS, **dict(zip("!@#$%^&*()", "1234567890"))}))
+# Keypad, with or without num lock (Tk types nothing for its other keys)
+register_decoder(CardDecoder("numpad", DIGITS))
+
+#-------------------------------------------------------------------#
+
+class LayoutDetector:
+    """
+    Finds the keyboard layout of the RFID reader from its scans.
+
+    The candidates are the layouts that could read every scan so far.
+    A scan is only accepted if all the candidates that can read it
+    read the same number: a scan they read differently is rejected
+    rather than guessed. Scans made of plain digits read the same with
+    every layout, so they never need the layout to be known.
+    """
+    def __init__(self, loggers=None, base:int=10, decoders:dict=None) -> None:
+        """
+        LayoutDetector's constructor.
+        `base` is the base of the card numbers typed (10 or 16).
+        """
+        self.loggers = loggers
+        self.base = base
+        self.layouts = list((decoders or DECODERS).values())
+        self.candidates = list(self.layouts)
+        self.ambiguous = 0 # Scans rejected because the layouts disagree
+
+    @property
+    def decoder(self) -> CardDecoder:
+        """
+        Layout detected, or None while several layouts are possible.
+        """
+        return self.candidates[0] if len(self.candidates) == 1 else None
+
+    def readings(self, decoders:list, buffer:str) -> dict:
+        """
+        Returns the card number read by each decoder that can read the scan.
+        """
+        readings = {}
+        for decoder in decoders:
+            card_id = decoder.decode(buffer, self.base)
+            if card_id is not None:
+                readings[decoder] = card_id
+        return readings
+
+    def log(self, message:str, *args) -> None:
+        """
+        Logs a message, if the detector has loggers.
+        """
+        if self.loggers is not None:
+            self.loggers.log.info(message, *args)
+
+    def decode(self, buffer:str) -> int:
+        """
+        Returns the card number typed, or None if it can't be read
+        or if its reading depends on the layout.
+        """
+        readings = self.readings(self.candidates, buffer)
+        if not readings:
+            # No candidate reads it: the reader may have changed.
+            readings = self.readings(self.layouts, buffer)
+            if not readings:
+                return None
+        if len(set(readings.values())) > 1:
+            self.ambiguous += 1
+            self.log("RFID scan rejected: it reads differently with layouts %s.",
+                     ", ".join(decoder.name for decoder in readings))
+            return None
+
+        candidates = list(readings)
+        if candidates != self.candidates:
+            self.candidates = candidates
+            if self.decoder is not None:
+                self.log("RFID reader layout detected: %s.", self.decoder.name)
+        return next(iter(readings.values()))
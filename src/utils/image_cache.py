@@ -0,0 +1,139 @@
+"""
+image_cache.py
+
+Defines the ImageCache class, an on-disk cache
+of the images of the GUI already resized.
+"""
+
+#-------------------------------------------------------------------#
+
+import os
+import struct
+import hashlib
+from PIL import Image, ImageOps, ImageFilter
+
+#-------------------------------------------------------------------#
+
+class ImageCache:
+    """
+    On-disk cache of the images once resized (and colorized).
+
+    Entries are raw pixels, named after a hash of the source
+    file's name, mtime and size and of the transformation
+    (target size, filter, color). Editing an image, or the way
+    it is opened, gives another name: stale entries are never read
+    and are replaced when the image is cached again.
+    """
+    VERSION = 1 # Bump to invalidate every entry
+    MAGIC = b"MNIC"
+    HEADER = struct.Struct("<4s4sII") # magic, mode, width, height
+    MODES = ("RGBA", "RGB", "LA", "L") # Modes stored as they are
+
+    def __init__(self, loggers, source_dir:str=None, cache_dir:str=None) -> None:
+        """
+        ImageCache's constructor.
+        """
+        self.loggers = loggers
+        self.source_dir = source_dir or os.path.join(os.getcwd(), "data", "images")
+        self.cache_dir = cache_dir or os.path.join(os.getcwd(), "data", "cache", "images")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def entry_name(self, file_name:str, stat:os.stat_result, width:int, height:int,
+                   resample:int, color:str) -> tuple:
+        """
+        Returns the prefix shared by the entries of a transformation
+        of the image and the name of the entry of its current version.
+        """
+        transformation = f"{self.VERSION}|{file_name}|{width}x{height}|{resample}|{color}"
+        prefix = hashlib.sha1(transformation.encode("utf-8")).hexdigest()[:16]
+        version = hashlib.sha1(f"{stat.st_mtime_ns}|{stat.st_size}".encode()).hexdigest()[:16]
+        return prefix, f"{prefix}-{version}.raw"
+
+    def open(self, file_name:str, width:int=None, height:int=None, color:str=None,
+             resample:int=Image.ANTIALIAS) -> Image.Image:
+        """
+        Returns the image resized (and colorized) as asked,
+        from the cache if possible.
+        """
+        source = os.path.join(self.source_dir, file_name)
+        prefix, name = self.entry_name(file_name, os.stat(source), width, height,
+                                       resample, color)
+        entry = os.path.join(self.cache_dir, name)
+
+        image = self.read(entry)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        image = self.transform(Image.open(source), width, height, color, resample)
+        self.write(entry, prefix, image)
+        return image
+
+    @staticmethod
+    def transform(image:Image.Image, width:int, height:int, color:str,
+                  resample:int) -> Image.Image:
+        """
+        Resizes and colorizes the image.
+        """
+        if width and height:
+            image = image.resize((width, height), resample)
+        if color:
+            image = image.convert('L')
+            image = ImageOps.colorize(image, "#000000",
+                                      color,).filter(ImageFilter.GaussianBlur(1))
+        return image
+
+    def read(self, entry:str) -> Image.Image:
+        """
+        Returns the image stored in the entry, or None.
+        """
+        try:
+            with open(entry, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            magic, mode, width, height = self.HEADER.unpack_from(data)
+            mode = mode.rstrip(b"\0").decode("ascii")
+            if magic != self.MAGIC or mode not in self.MODES:
+                raise ValueError("not an image of the cache")
+            return Image.frombuffer(mode, (width, height), data[self.HEADER.size:],
+                                    "raw", mode, 0, 1)
+        except (struct.error, ValueError) as err:
+            self.loggers.log.warning("Corrupted image cache entry %s: %s", entry, err)
+            os.remove(entry)
+            return None
+
+    def write(self, entry:str, prefix:str, image:Image.Image) -> None:
+        """
+        Stores the image in the entry and removes
+        the stale entries of the same transformation.
+        """
+        image.load()
+        if image.mode not in self.MODES:
+            image = image.convert("RGBA")
+        header = self.HEADER.pack(self.MAGIC, image.mode.encode("ascii"), *image.size)
+
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name != os.path.basename(entry):
+                os.remove(os.path.join(self.cache_dir, name))
+
+        try:
+            temporary = f"{entry}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                file.write(header)
+                file.write(image.tobytes())
+            os.replace(temporary, entry)
+        except OSError as err:
+            # The cache is only an optimisation
+            self.loggers.log.warning("Can't write the image cache entry %s: %s", entry, err)
+
+    def stats(self) -> dict:
+        """
+        Returns the hits and misses of the cache.
+        """
+        return {"hits": self.hits, "misses": self.misses}
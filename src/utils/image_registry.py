@@ -0,0 +1,121 @@
+"""
+image_registry.py
+
+Defines the ImageRegistry class, which loads
+the images of the GUI when they are first used.
+"""
+
+#-------------------------------------------------------------------#
+
+import time
+from tkinter import TclError
+from PIL import ImageTk
+
+#-------------------------------------------------------------------#
+
+class ImageRegistry:
+    """
+    Registry of the images of the GUI.
+
+    Images are registered by name at startup and only loaded
+    (through the image cache) the first time they are asked for.
+    A single PhotoImage is shared by every widget using the image.
+    When memory runs low, the least recently used images that no
+    widget displays anymore are dropped; they are loaded again
+    if they are asked for later.
+    """
+    LOW_MEMORY = 32 * 1024 # Available memory (kB) under which images are dropped
+
+    def __init__(self, master, image_cache, loggers) -> None:
+        """
+        ImageRegistry's constructor.
+        """
+        self.master = master
+        self.image_cache = image_cache
+        self.loggers = loggers
+        self.specs = {} # name -> (file_name, width, height, color)
+        self.images = {} # name -> PhotoImage loaded
+        self.last_used = {} # name -> time of the last access
+
+    def register(self, name:str, file_name:str,
+                 width:int=None, height:int=None, color:str=None) -> None:
+        """
+        Registers an image without loading it.
+        """
+        self.specs[name] = (file_name, width, height, color)
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.specs
+
+    def get(self, name:str) -> ImageTk.PhotoImage:
+        """
+        Returns the image, loaded on first access.
+        """
+        self.last_used[name] = time.monotonic()
+        photo = self.images.get(name)
+        if photo is None:
+            file_name, width, height, color = self.specs[name]
+            image = self.image_cache.open(file_name, width, height, color)
+            photo = ImageTk.PhotoImage(image, master=self.master)
+            self.images[name] = photo
+        return photo
+
+    def in_use(self, name:str) -> bool:
+        """
+        Returns True if a widget displays the image.
+        """
+        try:
+            return bool(self.master.tk.call("image", "inuse", self.images[name]))
+        except TclError:
+            return False
+
+    def trim(self, keep:int=0) -> int:
+        """
+        Drops the least recently used images no widget displays,
+        keeping at least `keep` images loaded.
+        Returns the number of images dropped.
+        """
+        unused = sorted((name for name in self.images if not self.in_use(name)),
+                        key=self.last_used.get)
+        dropped = unused[:max(0, len(self.images) - keep)]
+        for name in dropped:
+            del self.images[name]
+        if dropped:
+            self.loggers.log.debug("%s unused images dropped.", len(dropped))
+        return len(dropped)
+
+    def trim_if_low_memory(self) -> int:
+        """
+        Trims the registry if the memory available is low.
+        Returns the number of images dropped.
+        """
+        available = self.available_memory()
+        if available is None or available >= self.LOW_MEMORY:
+            return 0
+        self.loggers.log.info("Low memory (%s kB available), dropping unused images.",
+                              available)
+        dropped = self.trim()
+        self.loggers.log.info("Images: %s", self.stats())
+        return dropped
+
+    @staticmethod
+    def available_memory() -> int:
+        """
+        Returns the memory available in kB,
+        or None if it can't be known (not on Linux).
+        """
+        try:
+            with open("/proc/meminfo", "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def stats(self) -> dict:
+        """
+        Returns the number of images registered and loaded.
+        """
+        return {"registered": len(self.specs), "loaded": len(self.images),
+                **self.image_cache.stats()}
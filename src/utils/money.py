@@ -0,0 +1,156 @@
+"""
+money.py
+
+Defines the Money class, an amount of euros
+stored as an integer number of cents.
+"""
+
+#-------------------------------------------------------------------#
+
+import decimal
+import re
+
+#-------------------------------------------------------------------#
+
+class Money:
+    """
+    Amount of euros stored as an integer number of cents.
+
+    Sums and products by a quantity are exact integer arithmetic.
+    Amounts only enter through `parse`, which refuses anything
+    that isn't a whole number of cents (and floats altogether).
+    An int is only ever a number of cents: `parse` refuses ints,
+    and amounts are only compared with the int 0.
+    """
+    __slots__ = ("cents",)
+    PATTERN = re.compile(r"([+-]?)(\d+)(?:[.,](\d{1,2}))?")
+
+    def __init__(self, cents:int=0) -> None:
+        if not isinstance(cents, int) or isinstance(cents, bool):
+            raise TypeError(f"Money is built from an integer number of cents, not {cents!r}.")
+        self.cents = cents
+
+    @classmethod
+    def parse(cls, value) -> "Money":
+        """
+        Returns the amount of euros given as Money,
+        a Decimal or a string ("4.40", "4,4", "-10").
+        Raises ValueError if it isn't a whole number of cents.
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, (bool, float)):
+            raise TypeError(f"Can't make an exact amount of {value!r}.")
+        if isinstance(value, int):
+            raise TypeError(f"Ambiguous amount {value!r}: give a string of euros, "
+                            "or build Money from cents.")
+        if isinstance(value, decimal.Decimal):
+            cents = value * 100
+            if not cents.is_finite() or cents != cents.to_integral_value():
+                raise ValueError(f"{value} isn't a whole number of cents.")
+            return cls(int(cents))
+        if isinstance(value, str):
+            match = cls.PATTERN.fullmatch(value.strip())
+            if match is None:
+                raise ValueError(f"{value!r} isn't an amount of euros.")
+            sign, euros, cents = match.groups()
+            amount = int(euros) * 100 + int((cents or "0").ljust(2, "0"))
+            return cls(-amount if sign == "-" else amount)
+        raise TypeError(f"Can't make an amount of {type(value).__name__}.")
+
+    def to_decimal(self) -> decimal.Decimal:
+        """
+        Returns the amount as a Decimal with two decimal places
+        (as stored by the database).
+        """
+        return decimal.Decimal(self.cents).scaleb(-2)
+
+    def format(self, currency:str="€", separator:str="") -> str:
+        """
+        Returns the amount followed by the currency ("4.40€").
+        """
+        return f"{self}{separator}{currency}"
+
+    def __str__(self) -> str:
+        sign = "-" if self.cents < 0 else ""
+        euros, cents = divmod(abs(self.cents), 100)
+        return f"{sign}{euros}.{cents:02d}"
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        return NotImplemented
+
+    def __radd__(self, other):
+        # Lets sum() start from 0
+        if other == 0 and isinstance(other, int):
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        return NotImplemented
+
+    def __mul__(self, quantity):
+        if isinstance(quantity, int) and not isinstance(quantity, bool):
+            return Money(self.cents * quantity)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    def _cents_of(self, other) -> int:
+        """
+        Returns the cents of a Money, or 0 for the int 0 (sign checks), or None.
+        """
+        if isinstance(other, Money):
+            return other.cents
+        if other == 0 and isinstance(other, int) and not isinstance(other, bool):
+            return 0
+        return None
+
+    def __eq__(self, other) -> bool:
+        cents = self._cents_of(other)
+        if cents is None:
+            return NotImplemented
+        return self.cents == cents
+
+    def __hash__(self) -> int:
+        # Money() is equal to 0, so hashed like it
+        return hash(self.cents)
+
+    def __lt__(self, other) -> bool:
+        cents = self._cents_of(other)
+        if cents is None:
+            return NotImplemented
+        return self.cents < cents
+
+    def __le__(self, other) -> bool:
+        cents = self._cents_of(other)
+        if cents is None:
+            return NotImplemented
+        return self.cents <= cents
+
+    def __gt__(self, other) -> bool:
+        cents = self._cents_of(other)
+        if cents is None:
+            return NotImplemented
+        return self.cents > cents
+
+    def __ge__(self, other) -> bool:
+        cents = self._cents_of(other)
+        if cents is None:
+            return NotImplemented
+        return self.cents >= cents
@@ -0,0 +1,63 @@
+"""
+startup_timeline.py
+
+Defines the StartupTimeline class, which times
+the phases of the startup of the application.
+"""
+
+#-------------------------------------------------------------------#
+
+import threading
+import time
+from contextlib import contextmanager
+
+#-------------------------------------------------------------------#
+
+class StartupTimeline:
+    """
+    Records when each phase of the startup begins and ends,
+    and in which thread, so overlapping phases can be told apart.
+    """
+    def __init__(self, loggers) -> None:
+        """
+        StartupTimeline's constructor.
+        """
+        self.loggers = loggers
+        self.origin = time.perf_counter()
+        self.phases = [] # (name, thread, start, end), relative to origin
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name:str):
+        """
+        Times the phase run in the with block.
+        """
+        start = time.perf_counter() - self.origin
+        try:
+            yield
+        finally:
+            end = time.perf_counter() - self.origin
+            with self._lock:
+                self.phases.append((name, threading.current_thread().name, start, end))
+
+    def run(self, name:str, func:callable, *args, **kwargs):
+        """
+        Runs the function as a phase and returns its result.
+        """
+        with self.phase(name):
+            return func(*args, **kwargs)
+
+    def report(self) -> list:
+        """
+        Logs the duration of each phase and of the whole startup.
+        Returns the lines logged.
+        """
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[2])
+        lines = [f"{name:<12} {start:7.3f}s -> {end:7.3f}s  ({end - start:.3f}s, {thread})"
+                 for name, thread, start, end in phases]
+        total = max((phase[3] for phase in phases), default=0)
+        lines.append(f"{'startup':<12} {total:7.3f}s")
+        for line in lines:
+            self.loggers.log.info("Startup: %s", line)
+        return lines
@@ -0,0 +1,148 @@
+"""
+test_journal.py
+
+Tests of the journal replay: a cart is written once,
+however many times it is replayed or committed.
+"""
+
+#-------------------------------------------------------------------#
+
+import contextlib
+import decimal
+import logging
+import types
+
+import pytest
+from mysql.connector import errorcode
+from mysql.connector.errors import IntegrityError
+
+from src.server.db_cursor import DBCursor
+from src.server.journal import Journal
+from src.server.member_cache import MemberCache
+from src.utils.money import Money
+
+#-------------------------------------------------------------------#
+
+LOGGERS = types.SimpleNamespace(log=logging.getLogger("tests"))
+MEMBER_ID, CARD_ID = 1, 1234
+
+class FakeDatabase:
+    """
+    Members and orders tables, answering the requests of DBCursor
+    that write carts. `writer` simulates another writer committing
+    the cart between its check and its insert.
+    """
+    def __init__(self, balance:str) -> None:
+        self.balance = decimal.Decimal(balance)
+        self.orders = {} # order_uuid -> row
+        self.writer = None
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+class FakeCursor:
+    """
+    Cursor of the FakeDatabase.
+    """
+    def __init__(self, database:FakeDatabase) -> None:
+        self.database = database
+        self.rowcount = 0
+        self.row = None
+
+    def execute(self, query:str, params:tuple=()) -> None:
+        query = " ".join(query.split())
+        if query.startswith("SELECT 1 FROM orders"):
+            self.row = (1,) if params[0] in self.database.orders else None
+            if self.database.writer is not None:
+                writer, self.database.writer = self.database.writer, None
+                writer()
+        elif query.startswith("UPDATE members"):
+            self.database.balance -= params[0]
+            self.rowcount = 1
+        elif query.startswith("SELECT balance"):
+            self.row = (self.database.balance,)
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def executemany(self, query:str, rows:list) -> None:
+        assert query.lstrip().startswith("INSERT INTO orders")
+        for row in rows:
+            if row[4] in self.database.orders:
+                raise IntegrityError(msg="Duplicate entry", errno=errorcode.ER_DUP_ENTRY)
+        for row in rows:
+            self.database.orders[row[4]] = row
+
+    def fetchone(self) -> tuple:
+        return self.row
+
+    def close(self) -> None:
+        pass
+
+#-------------------------------------------------------------------#
+
+@pytest.fixture
+def database():
+    return FakeDatabase("10.00")
+
+@pytest.fixture
+def db_cursor(database):
+    db_cursor = DBCursor.__new__(DBCursor)
+    db_cursor.loggers = LOGGERS
+    db_cursor.pool = database
+    db_cursor.member_cache = MemberCache(LOGGERS)
+    db_cursor.roster = None
+    return db_cursor
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(types.SimpleNamespace(loggers=LOGGERS), path=str(tmp_path / "journal.db"))
+    yield journal
+    journal.close()
+
+def journal_cart(journal:Journal, **kwargs) -> str:
+    """
+    Journals a cart of two products for 4.40€.
+    """
+    orders = [(1, Money.parse("1.20"), 2), (2, Money.parse("2.00"), 1)]
+    return journal.append(MEMBER_ID, CARD_ID, Money.parse("4.40"), orders, **kwargs)
+
+#-------------------------------------------------------------------#
+
+def test_a_cart_replayed_twice_is_written_once(journal, db_cursor, database):
+    cart_uuid = journal_cart(journal)
+    assert journal.replay(db_cursor) == 1
+    assert journal.state(cart_uuid) == journal.FLUSHED
+
+    # Crash between the commit and the mark: the cart is replayed again.
+    journal.mark([cart_uuid], journal.PENDING)
+    assert journal.replay(db_cursor) == 1
+    assert journal.state(cart_uuid) == journal.FLUSHED
+    assert len(database.orders) == 2
+    assert database.balance == decimal.Decimal("5.60")
+
+def test_the_replay_leaves_carts_in_flight_alone(journal, db_cursor, database):
+    cart_uuid = journal_cart(journal, in_flight=True)
+    assert journal.pending() == []
+    assert journal.replay(db_cursor) == 0
+    assert not database.orders
+
+    journal.release(cart_uuid)
+    assert journal.replay(db_cursor) == 1
+
+def test_a_cart_committed_by_another_writer_is_not_an_error(journal, db_cursor, database):
+    cart_uuid = journal_cart(journal)
+    orders = journal.pending()[0][4]
+    database.writer = lambda: db_cursor.replay_carts(journal.pending())
+
+    assert db_cursor.commit_cart(MEMBER_ID, Money.parse("4.40"), orders, cart_uuid) is None
+    assert len(database.orders) == 2
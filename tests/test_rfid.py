@@ -0,0 +1,166 @@
+"""
+test_rfid.py
+
+Tests of the RFID pipeline: the reader fed through a pipe,
+the ScanFramer and the LayoutDetector.
+"""
+
+#-------------------------------------------------------------------#
+
+import logging
+import os
+import time
+import types
+
+import pytest
+
+from src.client.rfid_reader import RFIDReader
+from src.client.scan_framer import ScanFramer
+from src.utils.hardware import LayoutDetector
+
+#-------------------------------------------------------------------#
+
+LOGGERS = types.SimpleNamespace(log=logging.getLogger("tests"))
+
+# evdev keycodes of the characters typed by a QWERTY reader
+KEYCODES = {**{str((code - 1) % 10): code for code in range(2, 12)},
+            "A": 30, "B": 48, "C": 46, "D": 32, "E": 18, "F": 33}
+SHIFT, ENTER, KEY_Z = 42, 28, 44
+
+def key_events(codes:list, start:float=1.0, gap:float=0.002) -> bytes:
+    """
+    Returns the evdev events of the key presses, one every `gap` seconds.
+    """
+    events = b""
+    for index, code in enumerate(codes):
+        timestamp = start + index * gap
+        seconds = int(timestamp)
+        events += RFIDReader.EVENT.pack(seconds, round((timestamp - seconds) * 1e6),
+                                        RFIDReader.EV_KEY, code, 1)
+    return events
+
+@pytest.fixture
+def pipe():
+    """
+    Yields the ends of a pipe, closed after the test.
+    """
+    read_fd, write_fd = os.pipe()
+    yield read_fd, write_fd
+    for fd in (read_fd, write_fd):
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+def read_scans(reader:RFIDReader, count:int, timeout:float=2) -> list:
+    """
+    Returns the first `count` card numbers queued by the reader.
+    """
+    scans = []
+    deadline = time.monotonic() + timeout
+    while len(scans) < count and time.monotonic() < deadline:
+        queued, card_id = reader.get()
+        if queued:
+            scans.append(card_id)
+        else:
+            time.sleep(0.01)
+    return scans
+
+#-------------------------------------------------------------------#
+
+def test_reader_reads_text_scans_from_a_pipe(pipe):
+    read_fd, write_fd = pipe
+    reader = RFIDReader(LOGGERS, fd=read_fd)
+    reader.start()
+    try:
+        os.write(write_fd, "&é\"'(-è_\n".encode())
+        assert read_scans(reader, 1) == [12345678]
+    finally:
+        reader.stop()
+
+def test_reader_reads_hex_cards_from_evdev_events(pipe):
+    read_fd, write_fd = pipe
+    reader = RFIDReader(LOGGERS, fd=read_fd, mode=RFIDReader.EVDEV,
+                        decoder=LayoutDetector(LOGGERS, base=16))
+    reader.start()
+    try:
+        codes = [SHIFT] + [KEYCODES[char] for char in "04A1B2C3"] + [ENTER]
+        os.write(write_fd, key_events(codes))
+        assert read_scans(reader, 1) == [0x04A1B2C3]
+    finally:
+        reader.stop()
+
+def test_reader_rejects_frames_with_unmapped_keys(pipe):
+    read_fd, write_fd = pipe
+    reader = RFIDReader(LOGGERS, fd=read_fd, mode=RFIDReader.EVDEV,
+                        decoder=LayoutDetector(LOGGERS, base=16))
+    reader.start()
+    try:
+        codes = [KEYCODES[char] for char in "04A1"] + [KEY_Z] + [ENTER]
+        os.write(write_fd, key_events(codes))
+        assert read_scans(reader, 1) == [None]
+    finally:
+        reader.stop()
+
+#-------------------------------------------------------------------#
+
+def type_frame(framer:ScanFramer, frame:str, start:float, gap:float=0.002) -> str:
+    """
+    Types the frame then Enter, one key every `gap` seconds.
+    Returns what the framer accepted.
+    """
+    for index, char in enumerate(frame):
+        framer.key(char, start + index * gap)
+    return framer.enter(start + len(frame) * gap)
+
+def test_framer_accepts_a_burst():
+    framer = ScanFramer(LOGGERS)
+    assert type_frame(framer, "12345678", start=0) == "12345678"
+    assert framer.stats() == {"accepted": 1}
+
+def test_framer_drops_the_keys_typed_before_a_pause():
+    framer = ScanFramer(LOGGERS)
+    framer.key("9", 0)
+    assert type_frame(framer, "12345678", start=1) == "12345678"
+    assert framer.rejected["timeout"] == 1
+
+def test_framer_rejects_a_slow_enter_and_short_frames():
+    framer = ScanFramer(LOGGERS)
+    for index, char in enumerate("12345678"):
+        framer.key(char, index * 0.002)
+    assert framer.enter(1) is None
+    assert type_frame(framer, "12", start=2) is None
+    assert framer.stats() == {"accepted": 0, "timeout": 1, "short": 1}
+
+def test_framer_ignores_a_card_scanned_again():
+    framer = ScanFramer(LOGGERS)
+    assert type_frame(framer, "12345678", start=0) == "12345678"
+    assert type_frame(framer, "12345678", start=0.5) is None
+    assert type_frame(framer, "12345678", start=0.5 + ScanFramer.DUPLICATE_WINDOW) \
+        == "12345678"
+    assert framer.rejected["duplicate"] == 1
+
+#-------------------------------------------------------------------#
+
+def test_detector_reads_plain_digits_with_any_layout():
+    detector = LayoutDetector()
+    assert detector.decode("12345678") == 12345678
+    assert detector.decoder is None
+
+def test_detector_detects_the_layout():
+    detector = LayoutDetector()
+    assert detector.decode("&é\"'") == 1234
+    assert detector.decoder.name == "azerty"
+    assert detector.decode("!@#$") == 1234
+    assert detector.decoder.name == "qwerty"
+
+def test_detector_rejects_scans_read_differently_by_the_layouts():
+    detector = LayoutDetector()
+    # "&(" reads 15 with AZERTY and 79 with QWERTY
+    assert detector.decode("&(") is None
+    assert detector.ambiguous == 1
+
+def test_detector_never_guesses_the_base():
+    assert LayoutDetector().decode("04A1") is None
+    assert LayoutDetector(base=16).decode("04A1") == 0x04A1
+    assert LayoutDetector(base=16).decode("1234") == 0x1234